@@ -0,0 +1,318 @@
+"""
+Benchmarks of the app's stages: input validation, schedule calculation,
+response serialization, chart rendering, chart upload and end-to-end
+requests.
+
+    python -m app.benchmark --output benchmark.json
+    python -m app.benchmark --compare benchmark.json
+
+Results are seconds per call, written as JSON to compare between commits.
+Chart upload and end-to-end cases with charts run against the local
+or in-memory chart storage, or a local S3 stand-in, e.g. `moto_server`
+or MinIO at S3_ENDPOINT_URL, and are skipped for a remote bucket
+or with no S3 settings. Patterns select the sets of cases by the first
+part of the cases' names, e.g. "upload/*" or "e2e/*", the app's lifespan
+is only run for end-to-end cases.
+"""
+
+import argparse
+import fnmatch
+import io
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+from collections.abc import Callable
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from functools import partial
+from urllib.parse import urlsplit
+
+from decouple import UndefinedValueError
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.testclient import TestClient
+
+from .handlers import BypassAmountHandler
+from .main import (
+    CompoundInterestCalculator, ResponseFormat,
+    app, format_response, make_summer_bonus, schedule_states
+)
+from .tools import Plotter, S3ChartStorage, storage
+
+
+# hosts of the S3 stand-ins the upload cases are allowed to write to
+LOCAL_HOSTS: tuple[str, ...] = ("localhost", "127.0.0.1", "::1")
+
+PERIODS: tuple[int, ...] = (1, 12, 24, 36, 48, 60)
+CHART_PERIODS: tuple[int, ...] = (1, 12, 36, 60)
+
+DEPOSIT: dict[str, str | int | float] = {
+    "date"   : "31.01.2021",
+    "periods": 12,
+    "amount" : 10_000,
+    "rate"   : 6
+}
+
+
+def local_storage() -> bool:
+    """Check if charts storage is local or S3 endpoint is a local stand-in. """
+    if not isinstance(storage, S3ChartStorage):
+        return True
+    try:
+        endpoint_url = storage.client.meta.endpoint_url
+    except UndefinedValueError:  # S3 isn't configured
+        return False
+    return urlsplit(endpoint_url).hostname in LOCAL_HOSTS
+
+
+def make_schedule(periods: int) -> dict[str, float]:
+    """Schedule of the sample deposit with `periods` months. """
+    calculator = CompoundInterestCalculator(**{**DEPOSIT, "periods": periods})
+    return calculator.loop_schedule()
+
+
+# cases map names to their setups, setup returns a function to time;
+# setups are called for the cases to run only
+def validation_cases() -> dict[str, Callable]:
+    return {
+        "validation": lambda: partial(CompoundInterestCalculator, **DEPOSIT)
+    }
+
+
+def schedule_cases() -> dict[str, Callable]:
+    """
+    Monthly loop of both scenarios' handlers. States are cleared on every
+    call, so the schedule is calculated from scratch.
+    """
+    def case(periods: int, amount_handler) -> Callable:
+        calculator = CompoundInterestCalculator(
+            **{**DEPOSIT, "periods": periods}
+        )
+
+        def calculate():
+            schedule_states.clear()
+            calculator.loop_schedule(amount_handler)
+        return calculate
+
+    return {
+        f"schedule/{scenario}/{periods}": partial(
+            case, periods, amount_handler
+        )
+        for scenario, amount_handler in (
+            ("standard", BypassAmountHandler()),
+            ("special",  make_summer_bonus())
+        )
+        for periods in PERIODS
+    }
+
+
+def response_cases() -> dict[str, Callable]:
+    """
+    Serialization of the schedule's response: FastAPI's default path,
+    `jsonable_encoder` and `JSONResponse`, and the responses returned
+    by the endpoints in every format.
+    """
+    def default(content: dict) -> JSONResponse:
+        return JSONResponse(jsonable_encoder(content))
+
+    def case(periods: int, serialize: Callable) -> Callable:
+        content = {"data": make_schedule(periods), "chart": None}
+        return partial(serialize, content)
+
+    return {
+        f"response/{name}/{periods}": partial(case, periods, serialize)
+        for name, serialize in (
+            ("default", default),
+            ("orjson",  ORJSONResponse),
+            *(
+                (
+                    str(response_format),
+                    partial(format_response, response_format=response_format)
+                )
+                for response_format in (
+                    ResponseFormat.COLUMNS, ResponseFormat.MSGPACK
+                )
+            )
+        )
+        for periods in (12, 60)
+    }
+
+
+def chart_cases() -> dict[str, Callable]:
+    def case(periods: int) -> Callable:
+        plotter = Plotter(make_schedule(periods), body=b"")
+
+        def plot():
+            plotter.body = io.BytesIO()
+            plotter._plot_chart()
+        return plot
+
+    return {
+        f"chart/png/{periods}": partial(case, periods)
+        for periods in CHART_PERIODS
+    }
+
+
+def upload_cases() -> dict[str, Callable]:
+    if not local_storage():
+        return {}
+
+    def case(periods: int) -> Callable:
+        schedule = make_schedule(periods)
+        body = Plotter(schedule).body.getvalue()
+        # plotter's body is consumed by the upload
+        return lambda: Plotter(schedule, body=body).upload_chart()
+
+    return {
+        f"upload/png/{periods}": partial(case, periods)
+        for periods in (12, 60)
+    }
+
+
+def end_to_end_cases(client: TestClient) -> dict[str, Callable]:
+    """
+    Full requests. Every call is a new deposit, so neither schedule
+    nor chart is taken from the caches.
+    """
+    amounts = itertools.count(DEPOSIT["amount"])
+    chart_formats = ["none", "png"] if local_storage() else ["none"]
+
+    def case(path: str, chart_format: str) -> Callable:
+        def request():
+            response = client.post(
+                url=path,
+                params={"chart_format": chart_format},
+                json={**DEPOSIT, "amount": next(amounts)}
+            )
+            response.raise_for_status()
+        return request
+
+    return {
+        f"e2e{path}/{chart_format}": partial(case, path, chart_format)
+        for path in ("/standard", "/special")
+        for chart_format in chart_formats
+    }
+
+
+def measure(func: Callable, repeat: int) -> dict[str, float | int]:
+    """
+    Time `func` in `repeat` rounds of the number of calls lasting
+    at least 0.2 seconds, the way `timeit` command line does.
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    timings = [total / number for total in timer.repeat(repeat, number)]
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min"   : min(timings),
+        "median": statistics.median(timings),
+        "mean"  : statistics.mean(timings),
+        "stdev" : statistics.stdev(timings) if repeat > 1 else 0.0
+    }
+
+
+def metadata() -> dict[str, str | None]:
+    """Environment of the run to tell results apart. """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit"   : commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python"   : platform.python_version(),
+        "platform" : platform.platform()
+    }
+
+
+def selects(patterns: list[str] | None, prefix: str) -> bool:
+    """
+    Check if any of the glob `patterns` may match names of the cases
+    starting with `prefix`, all cases are selected by default.
+    """
+    return not patterns or any(
+        pattern.startswith("*")
+        or fnmatch.fnmatch(prefix, pattern.split("/", 1)[0])
+        for pattern in patterns
+    )
+
+
+def run(
+    patterns: list[str] | None = None, repeat: int = 5
+) -> dict[str, dict]:
+    """
+    Run cases whose names match any of the glob `patterns`, all by default.
+    """
+    results = {}
+    with ExitStack() as stack:
+        case_sets = {
+            "validation": validation_cases,
+            "schedule"  : schedule_cases,
+            "response"  : response_cases,
+            "chart"     : chart_cases,
+            "upload"    : upload_cases,
+            "e2e"       : lambda: end_to_end_cases(
+                stack.enter_context(TestClient(app))
+            )
+        }
+        cases = {}
+        for prefix, make_cases in case_sets.items():
+            if selects(patterns, prefix):
+                cases.update(make_cases())
+        for name, setup in cases.items():
+            if patterns and not any(
+                fnmatch.fnmatch(name, pattern) for pattern in patterns
+            ):
+                continue
+            results[name] = measure(setup(), repeat)
+            print(f"{name:<24} {results[name]["median"] * 1e6:>12.1f} us",
+                  file=sys.stderr)
+    return {"metadata": metadata(), "results": results}
+
+
+def compare(baseline: dict, current: dict) -> None:
+    """Print median timings of both runs and their ratio. """
+    print(f"{"case":<24} {"baseline, us":>14} {"current, us":>14} "
+          f"{"ratio":>8}")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        after = result["median"] * 1e6
+        if before is None:
+            print(f"{name:<24} {"-":>14} {after:>14.1f} {"-":>8}")
+            continue
+        before = before["median"] * 1e6
+        print(f"{name:<24} {before:>14.1f} {after:>14.1f} "
+              f"{after / before:>8.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "patterns", nargs="*", help="glob patterns of the cases to run"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="JSON file to write results to")
+    parser.add_argument("--compare", help="JSON file of the baseline results")
+    args = parser.parse_args()
+
+    current = run(args.patterns, args.repeat)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(current, file, indent=4)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            compare(json.load(file), current)
+    elif not args.output:
+        json.dump(current, sys.stdout, indent=4)
+
+
+if __name__ == "__main__":
+    main()
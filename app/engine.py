@@ -0,0 +1,219 @@
+from collections.abc import Callable
+
+import numpy as np
+
+from .handlers import AmountHandler, BypassAmountHandler, FloorAmountHandler
+
+
+# Veltkamp's splitter of a float64 into two halves, 2^27 + 1
+SPLITTER: float = 134_217_729.0
+
+
+def handles_cents_like(
+    amount_handler: AmountHandler, cents_handler: type[AmountHandler]
+) -> bool:
+    """
+    Check if the amount handler only scales amount within its validity
+    period and handles cents exactly like `cents_handler` class.
+    """
+    handler_class = type(amount_handler)
+    return (
+        handler_class.handle is AmountHandler.handle
+        and handler_class.handle_cents is cents_handler.handle_cents
+    )
+
+
+def supports(amount_handler: AmountHandler) -> bool:
+    """
+    Check if the amount handler has no cents logic and only scales amount,
+    so the schedule can be calculated as a cumulative product.
+    """
+    return handles_cents_like(amount_handler, BypassAmountHandler)
+
+
+def supports_floor(amount_handler: AmountHandler) -> bool:
+    """
+    Check if the amount handler floors cents and only scales amount,
+    so the schedule can be calculated in integer cents.
+    """
+    return handles_cents_like(amount_handler, FloorAmountHandler)
+
+
+def round_cents(amounts: np.ndarray) -> np.ndarray:
+    """
+    Round `amounts` to a full cent exactly like builtin `round(amount, 2)`.
+    `np.round` scales by 100 in floating point and may round the product
+    to a false tie, so ties are resolved by the exact rounding error
+    of the product, e.g. round(2.675, 2) -> 2.67 as 2.675 is 2.67499...
+    in binary, while np.round(2.675, 2) -> 2.68.
+    """
+    product = amounts * 100
+
+    # error-free transformation: amounts * 100 == product + error exactly
+    split = SPLITTER * amounts
+    high = split - (split - amounts)
+    low = amounts - high
+    error = (high * 100 - product) + low * 100
+
+    floor = np.floor(product)
+    cents = np.rint(product)  # round half to even for exact ties
+    tie = product - floor == 0.5
+    cents[tie & (error > 0)] = floor[tie & (error > 0)] + 1
+    cents[tie & (error < 0)] = floor[tie & (error < 0)]
+    return cents / 100
+
+
+def accrual_dates(starts: np.ndarray, periods: int) -> np.ndarray:
+    """
+    Monthly accrual dates of every start date as `datetime64[D]` array
+    of shape (deposits, periods). Day of month is clamped to the month's
+    length, e.g. 31.01 -> 28.02 -> 31.03, like `relativedelta` does.
+    """
+    first_months = starts.astype("datetime64[M]")
+    months = first_months[:, np.newaxis] + np.arange(periods)
+    month_starts = months.astype("datetime64[D]")
+    month_ends = (months + 1).astype("datetime64[D]") - 1
+    days = starts - first_months.astype("datetime64[D]")
+    return np.minimum(month_starts + days[:, np.newaxis], month_ends)
+
+
+def scale_factors(
+    starts: np.ndarray, periods: int, amount_handler: AmountHandler
+) -> np.ndarray:
+    """
+    Amount handler's scale factor of every (deposit, month) cell:
+    `scale` within the handler's validity period, 1 elsewhere.
+    """
+    dates = accrual_dates(starts, periods)
+    start_date = np.datetime64(amount_handler.start_date.date(), "D")
+    end_date = np.datetime64(amount_handler.end_date.date(), "D")
+    valid = (start_date <= dates) & (dates <= end_date)
+    return np.where(valid, amount_handler.scale, 1.0)
+
+
+def bypass_schedules(
+    starts : np.ndarray,
+    amounts: np.ndarray,
+    rates  : np.ndarray,
+    periods: int,
+    amount_handler: AmountHandler
+) -> np.ndarray:
+    """
+    Rounded monthly schedules of a batch of deposits as an array of shape
+    (deposits, periods), calculated with no Python-level iteration.
+    Requires the amount handler to be `supported`.
+
+    Multipliers are interleaved after the initial amount, i.e.
+    [amount, rate factor, scale, rate factor, scale,...], so the row's
+    cumulative product multiplies in the very same order as the loop
+    of `CompoundInterestCalculator.extend_state` and matches it
+    bit for bit.
+    """
+    factors = 1 + rates / 12 / 100
+    scaled = amount_handler.scale != 1
+    step = 2 if scaled else 1
+
+    multipliers = np.empty((len(amounts), 1 + step * periods))
+    multipliers[:, 0] = amounts
+    multipliers[:, 1::step] = factors[:, np.newaxis]
+    if scaled:
+        multipliers[:, 2::step] = scale_factors(
+            starts, periods, amount_handler
+        )
+
+    balances = np.multiply.accumulate(multipliers, axis=1)
+    return round_cents(balances[:, step::step])
+
+
+def floor_schedules(
+    starts : np.ndarray,
+    amounts: np.ndarray,
+    rates  : np.ndarray,
+    periods: int,
+    amount_handler: AmountHandler
+) -> np.ndarray:
+    """
+    Monthly schedules of a batch of deposits with cents floored as an array
+    of shape (deposits, periods). Balances are kept in integer cents and
+    the recurrence steps month by month over the whole batch at once.
+    Requires the amount handler to be `supports_floor`.
+
+    Every step replays the loop's float operations, i.e. cents / 100
+    * rate factor * scale truncated to a full cent, and matches it bit
+    for bit: an exact rational rate factor would differ from the loop
+    wherever the float product falls short of a full cent, e.g.
+    10_000 * (1 + 6 / 12 / 100) is floored to 10049.99.
+    """
+    factors = 1 + rates / 12 / 100
+    scales = (
+        scale_factors(starts, periods, amount_handler)
+        if amount_handler.scale != 1 else None
+    )
+
+    cents = np.asarray(amounts, dtype=np.int64) * 100
+    schedules = np.empty((len(cents), periods), dtype=np.int64)
+
+    for month in range(periods):
+        balances = cents / 100 * factors
+        if scales is not None:
+            balances *= scales[:, month]
+        # balances are positive, truncation is a floor
+        cents = (balances * 100).astype(np.int64)
+        schedules[:, month] = cents
+
+    return schedules / 100
+
+
+def seek(
+    evaluate: Callable[[np.ndarray], np.ndarray],
+    low: int,
+    high: int,
+    target: float,
+    batch_size: int
+) -> int | None:
+    """
+    Least integer of [`low`, `high`] whose balance reaches `target`,
+    `None` if even `high` falls short. `evaluate` maps an array
+    of integers to their balances, non-decreasing in the integer.
+
+    Bracketed bisection generalized to a batch: every step evaluates
+    `batch_size` evenly spaced candidates at once and shrinks the bracket
+    `batch_size` times instead of twice, e.g. 3 million amounts are
+    bracketed to a unit in 4 batched evaluations.
+    """
+    if evaluate(np.array([high]))[0] < target:
+        return None
+
+    # invariant: `high` reaches the target
+    while low < high:
+        candidates = np.unique(
+            np.linspace(low, high, batch_size).astype(np.int64)
+        )
+        first = int(np.argmax(evaluate(candidates) >= target))
+        if first == 0:
+            return int(candidates[0])
+        low, high = int(candidates[first - 1]) + 1, int(candidates[first])
+    return high
+
+
+def refine(
+    evaluate: Callable[[np.ndarray], np.ndarray],
+    guess: int,
+    low: int,
+    high: int,
+    target: float
+) -> int | None:
+    """
+    Least integer of [`low`, `high`] whose balance reaches `target`
+    starting from the closed form's `guess`, which is off by a unit
+    or so due to rounding of the balances. `None` if even `high` falls
+    short, see `seek`.
+    """
+    guess = min(max(guess, low), high)
+    while evaluate(np.array([guess]))[0] < target:
+        if guess == high:
+            return None
+        guess += 1
+    while guess > low and evaluate(np.array([guess - 1]))[0] >= target:
+        guess -= 1
+    return guess
@@ -1,8 +1,15 @@
+import bisect
+import copy
 import datetime
 from abc import ABC, abstractmethod
-from typing import Self
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from functools import lru_cache
+from typing import NamedTuple, Self
+
+from dateutil.relativedelta import relativedelta
 
 from .settings import (
+    CALENDAR_CACHE_SIZE,
     DATE_FORMAT,
     SCALE_MIN, SCALE_MAX
 )
@@ -16,11 +23,66 @@ class DateTime(datetime.datetime):
     """
 
     @classmethod
+    @lru_cache(maxsize=CALENDAR_CACHE_SIZE)
     def parse(cls, value: str) -> Self:
         return cls.strptime(value, DATE_FORMAT)
 
     def __str__(self) -> str:
-        return super().strftime(DATE_FORMAT)
+        # zero-pad the year explicitly: platforms disagree on "%Y" for years
+        # before 1000, e.g. glibc formats year 1 as "1" instead of "0001"
+        return super().strftime(
+            DATE_FORMAT.replace("%Y", f"{self.year:04}")
+        )
+
+
+class AccrualCalendar(NamedTuple):
+    """
+    Dates of monthly interest accruals and their string representations.
+    """
+    dates: tuple[DateTime, ...]
+    keys : tuple[str, ...]
+
+
+def iter_accrual_dates(date: DateTime, periods: int) -> Iterator[DateTime]:
+    """
+    Lazy counterpart of `accrual_calendar` for long horizons:
+    dates are generated one at a time and aren't cached.
+    """
+    # incrementing date in-place, one month per iteration,
+    # leads to wrong results, e.g. 31.01 -> 28.02 -> 28.03
+    for months in range(periods):
+        yield date + relativedelta(months=months)
+
+
+def max_accruals(date: DateTime) -> int:
+    """
+    Number of monthly accruals starting from `date` up to `DateTime.max`,
+    i.e. the last one is in year 9999 at the latest.
+    """
+    return (DateTime.max.year - date.year) * 12 + 12 - date.month + 1
+
+
+def accruals_fit(date: DateTime, periods: int) -> bool:
+    """Check if `periods` monthly accruals from `date` are valid dates. """
+    return periods <= max_accruals(date)
+
+
+@lru_cache(maxsize=CALENDAR_CACHE_SIZE)
+def accrual_calendar(date: DateTime, periods: int) -> AccrualCalendar:
+    """
+    Calendar of `periods` monthly interest accruals starting from `date`.
+    """
+    dates = tuple(iter_accrual_dates(date, periods))
+    return AccrualCalendar(dates=dates, keys=tuple(map(str, dates)))
+
+
+class CompiledHandler(NamedTuple):
+    """
+    Amount handler compiled for a calendar: scale factor of every month
+    and cents strategy applied after scaling.
+    """
+    scales      : tuple[float, ...]
+    handle_cents: Callable[[float], float]
 
 
 class AmountHandler(ABC):
@@ -45,6 +107,32 @@ class AmountHandler(ABC):
         )
         self.scale = clamp(scale, low=SCALE_MIN, high=SCALE_MAX)
 
+    def unscaled(self) -> Self:
+        """
+        Copy of the handler with the same cents logic and no scale factor,
+        i.e. the handler as it works outside of its validity period.
+        """
+        handler = copy.copy(self)
+        handler.start_date, handler.end_date = DateTime.min, DateTime.max
+        handler.scale = 1.0
+        return handler
+
+    @property
+    def cache_key(self) -> tuple:
+        """
+        Stable identity of the handler: its class and parameters.
+        Subclasses with parameters of their own should extend it.
+        """
+        return type(self), self.start_date, self.end_date, self.scale
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, AmountHandler):
+            return NotImplemented
+        return self.cache_key == other.cache_key
+
+    def __hash__(self) -> int:
+        return hash(self.cache_key)
+
     def handle(self, date: DateTime, amount: float) -> float:
         """
         Multiply `amount` by a `scale` factor if `date` is in the handler's
@@ -54,6 +142,33 @@ class AmountHandler(ABC):
             amount *= self.scale
         return self.__class__.handle_cents(amount)
 
+    def compile(self, dates: Sequence[DateTime]) -> CompiledHandler:
+        """
+        Compile the handler for the calendar `dates` ahead of time,
+        so handling the month's amount is a precomputed multiply followed
+        by `handle_cents`. Subclasses overriding `handle` should override
+        `compile` consistently, see `compiles`.
+        """
+        scales = tuple(
+            self.scale if self.start_date <= date <= self.end_date else 1.0
+            for date in dates
+        )
+        return CompiledHandler(scales, self.__class__.handle_cents)
+
+    @classmethod
+    def compiles(cls) -> bool:
+        """
+        Check if `compile` is consistent with `handle`, i.e. `handle`
+        isn't overridden below the class defining `compile`. Otherwise
+        the handler's custom logic is applied month by month.
+        """
+        def owner(name: str) -> int:
+            return next(
+                index for index, klass in enumerate(cls.__mro__)
+                if name in vars(klass)
+            )
+        return owner("compile") <= owner("handle")
+
     @staticmethod
     @abstractmethod
     def handle_cents(amount: float) -> float:
@@ -73,3 +188,90 @@ class FloorAmountHandler(AmountHandler):
     def handle_cents(amount: float) -> float:
         """Floor `amount` to a full cent, e.g. 0.(9) -> 0.99. """
         return int(amount * 100) / 100
+
+
+class HandlerChain(AmountHandler):
+    """
+    Chain of amount handlers, e.g. seasonal bonuses, tax windows and promo
+    periods. On every date amount is multiplied by the product of scales
+    of all handlers valid on that date, then cents are handled once
+    with the strategy of `cents_handler` class. Nested chains are
+    flattened into their handlers.
+    Validity periods are compiled into a sorted interval index, so date's
+    scale is looked up in logarithmic time of the number of handlers.
+    """
+
+    def __init__(
+        self,
+        handlers: Iterable[AmountHandler],
+        cents_handler: type[AmountHandler] = BypassAmountHandler
+    ) -> None:
+
+        super().__init__()
+        # nested chain's handlers are already flat, its cents strategy
+        # gives way to this chain's one like any other handler's
+        self.handlers = tuple(
+            nested
+            for handler in handlers
+            for nested in (
+                handler.handlers
+                if isinstance(handler, HandlerChain) else (handler,)
+            )
+        )
+        self.cents_handler = cents_handler
+
+        # first dates of the elementary intervals and their scale factors,
+        # dates before the first interval aren't scaled
+        self.breakpoints: list[DateTime] = []
+        self.scales: list[float] = []
+
+        breakpoints = set()
+        for handler in self.handlers:
+            if handler.scale == 1:
+                continue
+            breakpoints.add(handler.start_date)
+            # validity period is inclusive, next interval starts right after
+            if handler.end_date < DateTime.max:
+                breakpoints.add(
+                    handler.end_date + datetime.timedelta.resolution
+                )
+
+        for breakpoint in sorted(breakpoints):
+            scale = 1.0
+            for handler in self.handlers:
+                if handler.start_date <= breakpoint <= handler.end_date:
+                    scale *= handler.scale
+            self.breakpoints.append(breakpoint)
+            self.scales.append(scale)
+
+    def scale_at(self, date: DateTime) -> float:
+        """Product of scales of all handlers valid on `date`. """
+        index = bisect.bisect_right(self.breakpoints, date) - 1
+        return self.scales[index] if index >= 0 else 1.0
+
+    def handle(self, date: DateTime, amount: float) -> float:
+        """Multiply `amount` by the combined scale factor on `date`. """
+        scale = self.scale_at(date)
+        if scale != 1:
+            amount *= scale
+        return self.handle_cents(amount)
+
+    def handle_cents(self, amount: float) -> float:
+        """Handle cents with the strategy of `cents_handler` class. """
+        return self.cents_handler.handle_cents(amount)
+
+    def compile(self, dates: Sequence[DateTime]) -> CompiledHandler:
+        return CompiledHandler(
+            tuple(map(self.scale_at, dates)), self.cents_handler.handle_cents
+        )
+
+    def unscaled(self) -> AmountHandler:
+        return self.cents_handler()
+
+    @property
+    def cache_key(self) -> tuple:
+        return (
+            type(self),
+            self.cents_handler,
+            tuple(handler.cache_key for handler in self.handlers)
+        )
@@ -1,24 +1,98 @@
+import asyncio
 import json
+import logging
+import math
 import os
-from typing import Annotated
+from collections.abc import Iterator
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from enum import StrEnum
+from itertools import groupby
+from typing import Annotated, NamedTuple, Self
 
-from dateutil.relativedelta import relativedelta
-from fastapi import FastAPI, Request
+import numpy as np
+import msgpack
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.openapi.utils import get_openapi
-from fastapi.responses import JSONResponse
-from pydantic import AfterValidator, BaseModel, Field
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from pydantic import (
+    AfterValidator, BaseModel, Field, ValidationInfo,
+    field_validator, model_validator
+)
 from starlette.responses import RedirectResponse
 
+from . import engine, metrics
+from .profiling import ProfilingMiddleware
 from .handlers import (
     AmountHandler, BypassAmountHandler, FloorAmountHandler,
-    DateTime
+    AccrualCalendar, DateTime,
+    accrual_calendar, accruals_fit, iter_accrual_dates, max_accruals
+)
+from .settings import (
+    BATCH_SIZE_MAX,
+    FLOOR_ENGINE_BATCH_MIN,
+    GOAL_SEEK_BATCH_SIZE, GOAL_SEEK_RATE_DECIMALS,
+    GRID_AXIS_SIZE_MAX,
+    LAZY_CHARTS,
+    METADATA as M,
+    RENDER_OVERLOAD,
+    S3_URL_LIFESPAN,
+    SCHEDULE_CACHE_SIZE, SCHEDULE_CACHE_TTL,
+    STREAM_PERIODS_MAX,
+    STATUS_OK, STATUS_NOK, STATUS_UNAVAILABLE
+)
+from .tools import (
+    CHART_KEY_PATTERN,
+    ChartFormat, HeatmapPlotter, Plotter, RenderRejected, TTLCache,
+    chart_index, chart_key, lazy_charts, renderer, storage, uploader
 )
-from .settings import METADATA as M, STATUS_OK, STATUS_NOK
-from .tools import Plotter
 
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+
+async def warm_up(app: FastAPI) -> None:
+    """
+    Take the first request's latency at startup: warm up charts renderer
+    with a throwaway chart, which loads matplotlib, cyberpunk style, fonts
+    and the Agg backend, build the OpenAPI schema and connect to the charts
+    storage. App is ready when it's done, failed steps are only logged.
+    """
+    for step in (
+        renderer.warm_up,
+        lambda: asyncio.to_thread(app.openapi),
+        lambda: uploader.run(storage.warm_up)
+    ):
+        try:
+            await step()
+        except Exception:
+            logger.exception("Warm-up step failed")
+    app.state.ready = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Warm up the app in the background, stop charts renderer's worker
+    processes and charts uploader's threads on exit.
+    """
+    app.state.ready = False
+    warming_up = asyncio.create_task(warm_up(app))
+    yield
+    app.state.ready = False
+    warming_up.cancel()
+    renderer.shutdown()
+    uploader.shutdown()
+
+
+# responses are serialized by orjson; endpoints of the schedules return
+# the response itself, so FastAPI's `jsonable_encoder` doesn't walk
+# the schedules before serialization
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(metrics.EndpointMiddleware)
 
 
 def custom_openapi():
@@ -41,53 +115,163 @@ def custom_openapi():
 
     here = os.path.abspath(os.path.dirname(__file__))
 
+    # schemas of a single deposit's successful response and errors summary
+    ok_schema = {
+        "type": "object",
+        "properties": {
+            "data": {
+                "type": "object",
+                "additionalProperties": {"type": "number"}
+            },
+            "chart": {"type": "string"}
+        },
+        "required": ["data", "chart"]
+    }
+    # batch item's chart link is null if charts are skipped
+    ok_item_schema = {
+        **ok_schema,
+        "properties": {
+            **ok_schema["properties"],
+            "chart": {"type": ["string", "null"]}
+        }
+    }
+    # columnar representation of the schedule, see `ResponseFormat`
+    columns_schema = {
+        "type": "object",
+        "properties": {
+            "start"  : {"type": "string"},
+            "step"   : {"type": "string", "enum": list(Granularity)},
+            "amounts": {"type": "array", "items": {"type": "number"}}
+        },
+        "required": ["start", "step", "amounts"]
+    }
+
+    def with_columns(schema: dict) -> dict:
+        """Response's schema with the columnar schedule. """
+        if schema["type"] == "array":
+            return {**schema, "items": with_columns(schema["items"])}
+        return {
+            **schema,
+            "properties": {**schema["properties"], "data": columns_schema}
+        }
+
+    nok_example = {
+        "date"   : "Input should be a valid string",
+        "periods": "Input should be a valid integer",
+        "amount" : "Input should be a valid integer",
+        "rate"   : "Input should be a valid number"
+    }
+    nok_schema = {
+        "type": "object",
+        "additionalProperties": {"type": "string"}
+    }
+
     for path in ("/standard", "/special"):
         # load response example
         example_json = f"{here}/examples/{path.removeprefix("/")}.json"
         with open(example_json, "r", encoding="utf-8") as file:
             example = json.load(file)
 
-        # status code 200: set loaded example and schema
-        responses = openapi_schema["paths"][path]["post"]["responses"]
-        ok, nok = responses["200"], responses["422"]
+        # batch endpoint wraps single deposit's examples and schemas
+        # into arrays, errors are additionally grouped by item's index
+        for route, ok_example, ok_items, nok_errors, nok_items in (
+            (path, example, ok_schema, nok_example, nok_schema),
+            (
+                f"{path}/batch",
+                [example],
+                {"type": "array", "items": ok_item_schema},
+                {"0": nok_example},
+                {"type": "object", "additionalProperties": nok_schema}
+            )
+        ):
+            # status code 200: set loaded example and schema
+            responses = openapi_schema["paths"][route]["post"]["responses"]
+            ok, nok = responses["200"], responses["422"]
 
-        ok_content = ok["content"]["application/json"]
-        ok_content["example"] = example
-        ok_content["schema"] = {
-            "type": "object",
-            "properties": {
-                "data": {
-                    "type": "object",
-                    "additionalProperties": {"type": "number"}
-                },
-                "chart": {"type": "string"}
-            },
-            "required": ["data", "chart"]
-        }
+            ok_content = ok["content"]["application/json"]
+            ok_content["example"] = ok_example
+            ok_content["schema"] = ok_items
+            ok["content"][ResponseFormat.COLUMNS.media_type] = {
+                "schema": with_columns(ok_items)
+            }
+            ok["content"][ResponseFormat.MSGPACK.media_type] = {
+                "schema": with_columns(ok_items)
+            }
 
-        # status code 422: set example, schema and replace 422 with STATUS_NOK
-        nok_content = nok["content"]["application/json"]
-        nok_content["example"] = {
-            "errors": {
-                "date"   : "Input should be a valid string",
-                "periods": "Input should be a valid integer",
-                "amount" : "Input should be a valid integer",
-                "rate"   : "Input should be a valid number"
+            # status code 422: set example, schema
+            # and replace 422 with STATUS_NOK
+            nok_content = nok["content"]["application/json"]
+            nok_content["example"] = {"errors": nok_errors}
+            nok_content["schema"] = {
+                "type": "object",
+                "properties": {"errors": nok_items},
+                "required": ["errors"]
             }
-        }
-        nok_content["schema"] = {
-            "type": "object",
-            "properties": {
-                "errors": {
-                    "type": "object",
-                    "additionalProperties": {"type": "string"}
-                }
+            responses[str(STATUS_NOK)] = nok
+            del responses["422"]
+
+        # streaming endpoint responds with NDJSON rows, but fails
+        # with the very same errors summary as the single deposit's one
+        stream = openapi_schema["paths"][f"{path}/stream"]["post"]
+        responses = stream["responses"]
+        responses["200"]["content"] = {
+            "application/x-ndjson": {
+                "example": "".join(
+                    json.dumps({"date": date, "amount": amount}) + "\n"
+                    for date, amount in list(example["data"].items())[:3]
+                ),
+                "schema": {"type": "string"}
             },
-            "required": ["errors"]
+            **{
+                response_format.media_type: {
+                    "schema": {
+                        "type": "object",
+                        "properties": {"data": columns_schema},
+                        "required": ["data"]
+                    }
+                }
+                for response_format in (
+                    ResponseFormat.COLUMNS, ResponseFormat.MSGPACK
+                )
+            }
         }
         responses[str(STATUS_NOK)] = nok
         del responses["422"]
 
+        # sensitivity grid and goal seek fail with the errors summary too,
+        # errors of the grid range's bounds are grouped by the range's name
+        for route in (f"{path}/grid", f"{path}/goal"):
+            responses = openapi_schema["paths"][route]["post"]["responses"]
+            grid_nok = responses.pop("422")
+            grid_nok["content"]["application/json"] = {
+                "example": {
+                    "errors": {
+                        "amount": "Input should be a valid integer",
+                        "rate"  : {
+                            "stop": "Input should be less than or equal to 8"
+                        }
+                    }
+                },
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "errors": {
+                            "type": "object",
+                            "additionalProperties": {
+                                "anyOf": [{"type": "string"}, nok_schema]
+                            }
+                        }
+                    },
+                    "required": ["errors"]
+                }
+            }
+            responses[str(STATUS_NOK)] = grid_nok
+
+    # parameters of the other routes are plain strings, they can't fail
+    for operations in openapi_schema["paths"].values():
+        for operation in operations.values():
+            operation["responses"].pop("422", None)
+
     # remove unused schemas
     for error in ("HTTPValidationError", "ValidationError"):
         del openapi_schema["components"]["schemas"][error]
@@ -107,17 +291,190 @@ async def validation_errors_handler(
     Validation errors handler.
     Response contains errors summary matching pattern
     {"field_name_1": "description of the error",... }.
+    Errors of the batch request are grouped by index of the invalid item:
+    {"0": {"field_name_1": "description of the error",... },... }.
     """
-    errors_summary = {
-        error["loc"][1]: error["msg"]
-        for error in exc.errors()
-    }
-    return JSONResponse(
+    metrics.VALIDATION_FAILURES.labels(endpoint=metrics.endpoint.get()).inc()
+    errors_summary = {}
+
+    for error in exc.errors():
+        # drop leading "body" unless the request body is invalid as a whole
+        *indices, field = error["loc"][1:] or error["loc"]
+        summary = errors_summary
+        for index in indices:
+            summary = summary.setdefault(str(index), {})
+        summary[field] = error["msg"]
+
+    return ORJSONResponse(
         status_code=STATUS_NOK,
         content={"errors": errors_summary}
     )
 
 
+@app.exception_handler(RenderRejected)
+async def render_rejected_handler(request: Request, exc: RenderRejected):
+    """
+    Overloaded charts renderer's handler: fast 503 Service Unavailable
+    with Retry-After and the errors summary.
+    """
+    return ORJSONResponse(
+        status_code=STATUS_UNAVAILABLE,
+        content={"errors": {"chart": str(exc)}},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
+# memoized schedules, (date, periods, amount, rate, amount handler) -> schedule
+schedule_cache = TTLCache(maxsize=SCHEDULE_CACHE_SIZE, ttl=SCHEDULE_CACHE_TTL)
+
+
+class ScheduleState(NamedTuple):
+    """
+    Balances of the first months of a schedule: unrounded ones
+    to resume the calculation from and rounded ones to respond with.
+    """
+    balances: tuple[float, ...]
+    amounts : tuple[float, ...]
+
+
+# longest calculated prefixes of the schedules regardless of their length,
+# (date, amount, rate, amount handler) -> schedule state
+schedule_states = TTLCache(maxsize=SCHEDULE_CACHE_SIZE, ttl=SCHEDULE_CACHE_TTL)
+
+
+class Granularity(StrEnum):
+    """Granularity of the streamed schedule. """
+    MONTH = "month"
+    DAY   = "day"
+
+
+class ResponseFormat(StrEnum):
+    """
+    Representation of the schedules in the response: `json` dicts
+    of dates to amounts, `columns` of the start date, the step between
+    the dates and an array of amounts, as JSON or as `msgpack`.
+    """
+    JSON    = "json"
+    COLUMNS = "columns"
+    MSGPACK = "msgpack"
+
+    @property
+    def media_type(self) -> str:
+        return RESPONSE_MEDIA_TYPES[self]
+
+
+RESPONSE_MEDIA_TYPES: dict[ResponseFormat, str] = {
+    ResponseFormat.JSON   : "application/json",
+    ResponseFormat.COLUMNS: "application/vnd.columns+json",
+    ResponseFormat.MSGPACK: "application/msgpack"
+}
+
+# formats of the media types of the Accept header, including the aliases
+ACCEPTED_FORMATS: dict[str, ResponseFormat] = {
+    **{
+        media_type: response_format
+        for response_format, media_type in RESPONSE_MEDIA_TYPES.items()
+    },
+    "application/x-msgpack": ResponseFormat.MSGPACK,
+    "application/x-ndjson" : ResponseFormat.JSON,
+    "*/*"                  : ResponseFormat.JSON
+}
+
+
+def negotiate_format(
+    request: Request,
+    response_format: Annotated[
+        ResponseFormat | None,
+        Query(
+            alias="format",
+            description="Representation of the schedules, "
+                        "overrides the Accept header"
+        )
+    ] = None
+) -> ResponseFormat:
+    """
+    Response format: `format` parameter if set, otherwise the most
+    preferred known media type of the Accept header, `json` by default.
+    """
+    if response_format is not None:
+        return response_format
+
+    preferred, preference = ResponseFormat.JSON, 0.0
+    for media_range in request.headers.get("accept", "").split(","):
+        media_type, *params = media_range.split(";")
+        accepted = ACCEPTED_FORMATS.get(media_type.strip().lower())
+        if accepted is None:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        # the first of the equally preferred media types wins
+        if quality > preference:
+            preferred, preference = accepted, quality
+    return preferred
+
+
+def schedule_columns(
+    schedule: dict[str, float], step: str = "month"
+) -> dict[str, str | list[float]]:
+    """
+    Columnar representation of the schedule: dates are implied
+    by the start date and the step between them.
+    """
+    return {
+        "start"  : next(iter(schedule), None),
+        "step"   : step,
+        "amounts": list(schedule.values())
+    }
+
+
+def encode_response(
+    content: dict | list[dict], response_format: ResponseFormat
+) -> Response:
+    """
+    Response of the content serialized in the format's media type,
+    representation varies with the Accept header.
+    """
+    headers = {"Vary": "Accept"}
+    if response_format == ResponseFormat.MSGPACK:
+        return Response(
+            msgpack.packb(content),
+            media_type=response_format.media_type,
+            headers=headers
+        )
+    return ORJSONResponse(
+        content, media_type=response_format.media_type, headers=headers
+    )
+
+
+def format_response(
+    content: dict | list[dict], response_format: ResponseFormat
+) -> Response:
+    """
+    Response of a deposit's or batch's {"data": schedule, ...} content
+    in the negotiated format, schedules are columns unless it's `json`.
+    """
+    def columnar(item: dict) -> dict:
+        return {**item, "data": schedule_columns(item["data"])}
+
+    if response_format != ResponseFormat.JSON:
+        content = (
+            list(map(columnar, content)) if isinstance(content, list)
+            else columnar(content)
+        )
+    return encode_response(content, response_format)
+
+
+def ndjson_row(date: DateTime, amount: float) -> str:
+    """Schedule row as a line of newline delimited JSON. """
+    return json.dumps({"date": str(date), "amount": amount}) + "\n"
+
+
 class CompoundInterestCalculator(BaseModel):
     """
     Compound interest calculator with monthly schedule.
@@ -155,26 +512,830 @@ class CompoundInterestCalculator(BaseModel):
         }
     }
 
-    def calculate_interest(
+    @model_validator(mode="wrap")
+    @classmethod
+    def observe_validation(cls, data, handler):
+        """Observe validation time of the request's deposit. """
+        with metrics.stage("validation"):
+            return handler(data)
+
+    @field_validator("periods")
+    @classmethod
+    def check_horizon(cls, periods: int, info: ValidationInfo) -> int:
+        """Check the last accrual is a valid date. """
+        date = info.data.get("date")  # missing if the date is invalid
+        if date is not None and not accruals_fit(date, periods):
+            raise ValueError(
+                f"Investment ends after the year {DateTime.max.year}"
+            )
+        return periods
+
+    def calendar(self) -> AccrualCalendar:
+        """Calendar of monthly interest accruals. """
+        return accrual_calendar(self.date, self.periods)
+
+    def schedule_key(self, amount_handler: AmountHandler) -> tuple:
+        """Key of the schedule in the memoized schedules' cache. """
+        return self.date, self.periods, self.amount, self.rate, amount_handler
+
+    def calculate_schedule(
         self, amount_handler: AmountHandler = BypassAmountHandler()
-    ) -> dict[str, dict[str, float] | str]:
+    ) -> dict[str, float]:
         """
         Calculate monthly interest schedule with provided amount handler.
-        `amount_handler` defaults to `BypassAmountHandler` instance.
+        Schedule is memoized, see `calculate_schedules`.
+        """
+        return self.calculate_schedules([self], amount_handler)[0]
+
+    def loop_schedule(
+        self, amount_handler: AmountHandler = BypassAmountHandler()
+    ) -> dict[str, float]:
+        """
+        Calculate monthly interest schedule applying provided amount
+        handler, see `extend_state`. The recurrence is strictly forward,
+        so the calculation resumes from the longest known prefix
+        (see `resume_state`) and only the remaining months are calculated.
+        """
+        state = self.resume_state(amount_handler)
+        if len(state.balances) < self.periods:
+            state = self.extend_state(state, amount_handler)
+            schedule_states.set(self.state_key(amount_handler), state)
+        return dict(zip(self.calendar().keys, state.amounts[:self.periods]))
+
+    def extend_state(
+        self,
+        state: ScheduleState,
+        amount_handler: AmountHandler = BypassAmountHandler()
+    ) -> ScheduleState:
+        """
+        Calculate the months of the schedule following the known prefix
+        `state`, with no cache, applying provided amount handler compiled
+        for the calendar, or month by month if it can't be compiled,
+        see `AmountHandler.compiles`.
         """
-        date, periods, amount, rate = self.model_dump(warnings=False).values()
-        monthly_schedule = {}
+        balances, amounts = list(state.balances), list(state.amounts)
+        months = self.calendar().dates[len(balances):]
+        amount = balances[-1] if balances else self.amount
+
+        if amount_handler.compiles():
+            scales, handle_cents = amount_handler.compile(months)
+            for scale in scales:
+                amount *= 1 + self.rate / 12 / 100
+                if scale != 1:
+                    amount *= scale
+                amount = handle_cents(amount)
+                balances.append(amount)
+        else:
+            for next_date in months:
+                amount *= 1 + self.rate / 12 / 100
+                amount = amount_handler.handle(next_date, amount)
+                balances.append(amount)
+        amounts.extend(
+            round(balance, 2) for balance in balances[len(amounts):]
+        )
+        return ScheduleState(tuple(balances), tuple(amounts))
 
-        for months in range(periods):
-            # incrementing date in-place, one month per iteration,
-            # leads to wrong results, e.g. 31.01 -> 28.02 -> 28.03
-            next_date = date + relativedelta(months=months)
-            amount *= 1 + rate / 12 / 100
+    def state_key(self, amount_handler: AmountHandler) -> tuple:
+        """Key of the schedule's state, the same for any `periods`. """
+        return self.date, self.amount, self.rate, amount_handler
+
+    def resume_state(self, amount_handler: AmountHandler) -> ScheduleState:
+        """
+        Longest known prefix of the schedule: either the schedule's own
+        state, calculated for any `periods`, or, for a what-if handler
+        with a validity period starting at month k, the first k months
+        of the unscaled handler's schedule, e.g. the months of the special
+        scenario before summer 2021. Empty if neither is cached.
+        """
+        state = schedule_states.get(self.state_key(amount_handler))
+        if state is not None:
+            return state
+
+        # months of custom handling logic can't be told in advance
+        unscaled_handler = amount_handler.unscaled()
+        if (
+            not amount_handler.compiles()
+            or unscaled_handler == amount_handler
+        ):
+            return ScheduleState((), ())
+
+        state = schedule_states.get(self.state_key(unscaled_handler))
+        if state is None:
+            return ScheduleState((), ())
+
+        # months up to the first scaled one are the same
+        dates = accrual_calendar(self.date, len(state.balances)).dates
+        scales = amount_handler.compile(dates).scales
+        months = next(
+            (month for month, scale in enumerate(scales) if scale != 1),
+            len(scales)
+        )
+        return ScheduleState(state.balances[:months], state.amounts[:months])
+
+    @staticmethod
+    @metrics.stage("calculation")
+    def calculate_schedules(
+        calculators: list["CompoundInterestCalculator"],
+        amount_handler: AmountHandler = BypassAmountHandler()
+    ) -> list[dict[str, float]]:
+        """
+        Calculate monthly interest schedules of a batch of deposits.
+        Memoized schedules are taken from the cache, the missing ones
+        are calculated and cached: amount handlers with no cents logic
+        in one vectorized pass across all periods and all deposits, floor
+        cents handlers in integer cents across all deposits of the large
+        enough batch, others month by month.
+        Cached schedules are shared, don't mutate.
+        """
+        keys = [
+            calculator.schedule_key(amount_handler)
+            for calculator in calculators
+        ]
+        schedules = [schedule_cache.get(key) for key in keys]
+        missing = [
+            index for index, schedule in enumerate(schedules)
+            if schedule is None
+        ]
+        if not missing:
+            return schedules
+
+        misses = [calculators[index] for index in missing]
+        if engine.supports(amount_handler) or (
+            engine.supports_floor(amount_handler)
+            and len(misses) >= FLOOR_ENGINE_BATCH_MIN
+        ):
+            calculated = CompoundInterestCalculator.vectorized_schedules(
+                misses, amount_handler
+            )
+        else:
+            calculated = [
+                calculator.loop_schedule(amount_handler)
+                for calculator in misses
+            ]
+
+        for index, schedule in zip(missing, calculated):
+            schedules[index] = schedule
+            schedule_cache.set(keys[index], schedule)
+        return schedules
+
+    @staticmethod
+    def vectorized_schedules(
+        calculators: list["CompoundInterestCalculator"],
+        amount_handler: AmountHandler = BypassAmountHandler()
+    ) -> list[dict[str, float]]:
+        """
+        Calculate monthly interest schedules of a batch of deposits
+        with the engine, with no cache. Requires the amount handler
+        to be supported by the engine, see `engine.supports`
+        and `engine.supports_floor`.
+        """
+        schedules = (
+            engine.bypass_schedules
+            if engine.supports(amount_handler) else engine.floor_schedules
+        )
+        # shorter schedules are prefixes of the longest one's shape
+        balances = schedules(
+            starts=np.array(
+                [calculator.date.date() for calculator in calculators],
+                dtype="datetime64[D]"
+            ),
+            amounts=np.array(
+                [calculator.amount for calculator in calculators]
+            ),
+            rates=np.array([calculator.rate for calculator in calculators]),
+            periods=max(calculator.periods for calculator in calculators),
+            amount_handler=amount_handler
+        )
+        return [
+            dict(zip(
+                calculator.calendar().keys,
+                row[:calculator.periods].tolist()
+            ))
+            for calculator, row in zip(calculators, balances)
+        ]
+
+    def iter_schedule(
+        self, amount_handler: AmountHandler = BypassAmountHandler()
+    ) -> Iterator[tuple[DateTime, float]]:
+        """
+        Generator counterpart of `calculate_schedule`: yields date
+        and rounded balance of every monthly accrual one at a time,
+        so memory doesn't depend on the investment length.
+        """
+        amount = self.amount
+
+        for next_date in iter_accrual_dates(self.date, self.periods):
+            amount *= 1 + self.rate / 12 / 100
             amount = amount_handler.handle(next_date, amount)
-            monthly_schedule[str(next_date)] = round(amount, 2)
+            yield next_date, round(amount, 2)
+
+    def iter_rows(
+        self,
+        amount_handler: AmountHandler = BypassAmountHandler(),
+        granularity: Granularity = Granularity.MONTH
+    ) -> Iterator[tuple[DateTime, float]]:
+        """
+        Dates and rounded balances of the schedule in the granularity.
+        In daily granularity every day holds the balance of the latest
+        accrual up to the next one, the last row is the last accrual.
+        """
+        schedule = self.iter_schedule(amount_handler)
+
+        if granularity == Granularity.MONTH:
+            yield from schedule
+            return
+
+        date, amount = next(schedule)
+        for next_date, next_amount in schedule:
+            for days in range((next_date - date).days):
+                yield date + timedelta(days=days), amount
+            date, amount = next_date, next_amount
+        yield date, amount
+
+    def iter_interest(
+        self,
+        amount_handler: AmountHandler = BypassAmountHandler(),
+        granularity: Granularity = Granularity.MONTH
+    ) -> Iterator[str]:
+        """
+        Generator counterpart of `interest_response` with no chart:
+        yields NDJSON rows {"date": ..., "amount": ...} one month at a time,
+        see `iter_rows`.
+        """
+        rows = self.iter_rows(amount_handler, granularity)
+        # daily rows of a month are sent at once
+        for _, month in groupby(rows, key=lambda row: row[0].timetuple()[:2]):
+            yield "".join(ndjson_row(date, amount) for date, amount in month)
+
+
+class LongHorizonCalculator(CompoundInterestCalculator):
+    """
+    Compound interest calculator of the streaming endpoints,
+    investment length is up to `STREAM_PERIODS_MAX` months.
+    """
+
+    periods: int = Field(
+        ge=M["periods"].ge,
+        le=STREAM_PERIODS_MAX,  # inclusive range
+        description="Investment length, months"
+    )
+
+
+def stream_response(
+    calculator: LongHorizonCalculator,
+    amount_handler: AmountHandler,
+    granularity: Granularity,
+    response_format: ResponseFormat = ResponseFormat.JSON
+) -> Response:
+    """
+    Stream schedule rows as they're calculated: the first bytes go out
+    before the whole schedule is computed. Columnar formats aren't
+    streamed, the whole schedule's columns are sent at once.
+    """
+    if response_format == ResponseFormat.JSON:
+        return StreamingResponse(
+            calculator.iter_interest(amount_handler, granularity),
+            media_type="application/x-ndjson",
+            headers={"Vary": "Accept"}
+        )
+    dates, amounts = zip(
+        *calculator.iter_rows(amount_handler, granularity)
+    )
+    columns = {
+        "start"  : str(dates[0]),
+        "step"   : str(granularity),
+        "amounts": list(amounts)
+    }
+    return encode_response({"data": columns}, response_format)
+
 
-        url = Plotter(monthly_schedule).upload_chart()
-        return {"data": monthly_schedule, "chart": url}
+class GridRange(BaseModel):
+    """
+    Inclusive range of the sensitivity grid's axis: values from `start`
+    up to `stop` with `step`. Subclasses bound the values.
+    """
+
+    start: float
+    stop : float
+    step : float
+
+    @model_validator(mode="after")
+    def check_size(self) -> Self:
+        """Check the range isn't reversed or too long. """
+        if self.stop < self.start:
+            raise ValueError("Range's stop is less than its start")
+        # e.g. a tiny step overflows the number of steps to infinity
+        steps = self.steps()
+        if not math.isfinite(steps) or steps >= GRID_AXIS_SIZE_MAX:
+            raise ValueError(
+                f"Range has more than {GRID_AXIS_SIZE_MAX} values"
+            )
+        return self
+
+    def steps(self) -> float:
+        """Number of steps from `start` up to `stop`, may be fractional. """
+        # tolerate float division error, e.g. 0.3 / 0.1 = 2.9999999999999996
+        return (self.stop - self.start) / self.step + 1e-9
+
+    def size(self) -> int:
+        """Number of the range's values. """
+        return int(self.steps()) + 1
+
+    def values(self) -> list:
+        """Range's values, floats are freed from the accumulated error. """
+        return [
+            round(self.start + index * self.step, 10)
+            for index in range(self.size())
+        ]
+
+
+class RateRange(GridRange):
+    """Range of annual interest rates, percent. """
+
+    start: float = Field(
+        ge=M["rate"].ge, le=M["rate"].le, allow_inf_nan=False
+    )
+    stop : float = Field(
+        ge=M["rate"].ge, le=M["rate"].le, allow_inf_nan=False
+    )
+    step : float = Field(default=0.5, gt=0, allow_inf_nan=False)
+
+
+class PeriodsRange(GridRange):
+    """Range of investment lengths, months. """
+
+    start: int = Field(ge=M["periods"].ge, le=M["periods"].le)
+    stop : int = Field(ge=M["periods"].ge, le=M["periods"].le)
+    step : int = Field(default=1, ge=1)
+
+
+class SensitivityGrid(BaseModel):
+    """
+    What-if grid of a deposit: every rate of the `rate` range
+    by every term of the `periods` range.
+    """
+
+    # date of the first interest accrual
+    date: Annotated[str, AfterValidator(DateTime.parse)]
+
+    amount: int = Field(
+        ge=M["amount"].ge,
+        le=M["amount"].le,   # inclusive range
+        description="Initial investment, unit of currency"
+    )
+    rate   : RateRange
+    periods: PeriodsRange
+    # example value for the OpenAPI
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "date"   : "31.01.2021",
+                    "amount" : 10_000,
+                    "rate"   : {"start": 4, "stop": 8, "step": 0.5},
+                    "periods": {"start": 6, "stop": 60, "step": 6}
+                }
+            ]
+        }
+    }
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def observe_validation(cls, data, handler):
+        """Observe validation time of the request's grid. """
+        with metrics.stage("validation"):
+            return handler(data)
+
+    @field_validator("periods")
+    @classmethod
+    def check_horizon(
+        cls, periods: PeriodsRange, info: ValidationInfo
+    ) -> PeriodsRange:
+        """Check the last accrual of the longest term is a valid date. """
+        date = info.data.get("date")  # missing if the date is invalid
+        if date is not None and not accruals_fit(date, periods.values()[-1]):
+            raise ValueError(
+                f"Investment ends after the year {DateTime.max.year}"
+            )
+        return periods
+
+    def calculate_grid(
+        self, amount_handler: AmountHandler = BypassAmountHandler()
+    ) -> tuple[dict[str, list], list[dict[str, float]]]:
+        """
+        Calculate the grid of final balances, a row of terms per rate,
+        and the schedules of the longest term per rate. Every schedule
+        is calculated once, in a single batch across all rates, since
+        shorter terms' schedules are its prefixes.
+        """
+        rates, periods = self.rate.values(), self.periods.values()
+        calculators = [
+            # bounds are already validated by the grid's ranges
+            CompoundInterestCalculator.model_construct(
+                date=self.date,
+                periods=periods[-1],
+                amount=self.amount,
+                rate=rate
+            )
+            for rate in rates
+        ]
+        schedules = CompoundInterestCalculator.calculate_schedules(
+            calculators, amount_handler
+        )
+        balances = [list(schedule.values()) for schedule in schedules]
+        grid = {
+            "rates"  : rates,
+            "periods": periods,
+            "data"   : [
+                [row[term - 1] for term in periods] for row in balances
+            ]
+        }
+        return grid, schedules
+
+
+class Unknown(StrEnum):
+    """Deposit's parameter solved by the goal seek. """
+    RATE    = "rate"
+    AMOUNT  = "amount"
+    PERIODS = "periods"
+
+
+# parameters the goal seek needs to solve the unknown
+GOAL_SEEK_KNOWNS: dict[Unknown, tuple[str, ...]] = {
+    Unknown.RATE   : ("amount",),
+    Unknown.AMOUNT : ("rate",),
+    Unknown.PERIODS: ("amount", "rate")
+}
+
+
+def goal_error(field: str, message: str) -> RequestValidationError:
+    """Goal seek's error in the request validation errors' shape. """
+    return RequestValidationError(
+        [{"loc": ("body", field), "msg": message, "type": "value_error"}]
+    )
+
+
+class GoalSeek(BaseModel):
+    """
+    Inverse calculation: the lowest rate, the lowest initial amount
+    or the shortest term of the deposit, whose balance reaches `target`
+    by `by` date. The other two parameters are given, the term of the rate
+    and amount is the number of accruals from `date` through `by`.
+    """
+
+    solve: Unknown
+
+    # date of the first interest accrual
+    date: Annotated[str, AfterValidator(DateTime.parse)]
+    # date to reach the target balance by
+    by  : Annotated[str, AfterValidator(DateTime.parse)]
+
+    target: float = Field(
+        gt=0,
+        allow_inf_nan=False,
+        description="Target balance, unit of currency"
+    )
+    amount: int | None = Field(
+        default=None,
+        ge=M["amount"].ge,
+        le=M["amount"].le,   # inclusive range
+        description="Initial investment, unit of currency"
+    )
+    rate: float | None = Field(
+        default=None,
+        ge=M["rate"].ge,
+        le=M["rate"].le,     # inclusive range
+        description="Annual interest rate, percent"
+    )
+    # example value for the OpenAPI
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "solve" : "rate",
+                    "date"  : "31.01.2021",
+                    "by"    : "31.12.2021",
+                    "target": 10_500,
+                    "amount": 10_000
+                }
+            ]
+        }
+    }
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def observe_validation(cls, data, handler):
+        """Observe validation time of the request's goal. """
+        with metrics.stage("validation"):
+            return handler(data)
+
+    def horizon(self) -> int:
+        """
+        Number of accruals from `date` through `by`, counted up
+        to the next one after the longest term or up to year 9999.
+        """
+        dates = accrual_calendar(
+            self.date, min(M["periods"].le + 1, max_accruals(self.date))
+        ).dates
+        return sum(date <= self.by for date in dates)
+
+    def deposit(
+        self, periods: int, amount: int, rate: float
+    ) -> CompoundInterestCalculator:
+        """Deposit of the goal, its parameters are within the bounds. """
+        return CompoundInterestCalculator.model_construct(
+            date=self.date, periods=periods, amount=amount, rate=rate
+        )
+
+    def balances(
+        self,
+        amounts: np.ndarray | int,
+        rates: np.ndarray | float,
+        periods: int,
+        amount_handler: AmountHandler
+    ) -> np.ndarray:
+        """
+        Batched schedule evaluator of the goal seek: rounded monthly
+        balances of the candidates as an array of shape (candidates,
+        periods), calculated by the engine, or month by month if the
+        amount handler isn't supported by the engine. Candidates' states
+        aren't cached, they're throwaway.
+        """
+        amounts, rates = np.broadcast_arrays(
+            np.atleast_1d(amounts), np.atleast_1d(rates).astype(float)
+        )
+        if engine.supports(amount_handler) or engine.supports_floor(
+            amount_handler
+        ):
+            schedules = (
+                engine.bypass_schedules if engine.supports(amount_handler)
+                else engine.floor_schedules
+            )
+            return schedules(
+                starts=np.full(
+                    len(amounts), np.datetime64(self.date.date(), "D")
+                ),
+                amounts=amounts,
+                rates=rates,
+                periods=periods,
+                amount_handler=amount_handler
+            )
+        empty = ScheduleState((), ())
+        return np.array([
+            self.deposit(periods, int(amount), float(rate)).extend_state(
+                empty, amount_handler
+            ).amounts
+            for amount, rate in zip(amounts, rates)
+        ])
+
+    def scales(self, periods: int, amount_handler: AmountHandler) -> float:
+        """Product of the amount handler's scale factors over the term. """
+        return math.prod(
+            amount_handler.compile(
+                accrual_calendar(self.date, periods).dates
+            ).scales
+        )
+
+    def solve_rate(
+        self, periods: int, amount_handler: AmountHandler
+    ) -> CompoundInterestCalculator | None:
+        """Deposit with the lowest rate reaching the target. """
+        # rate in integer units of the last decimal place
+        unit = 10 ** GOAL_SEEK_RATE_DECIMALS
+        low, high = round(M["rate"].ge * unit), round(M["rate"].le * unit)
+
+        def evaluate(units: np.ndarray) -> np.ndarray:
+            return self.balances(
+                self.amount, units / unit, periods, amount_handler
+            )[:, -1]
+
+        if engine.supports(amount_handler):
+            # amount * (1 + rate / 12 / 100) ** periods * scales = target
+            growth = self.target / (
+                self.amount * self.scales(periods, amount_handler)
+            )
+            rate = (growth ** (1 / periods) - 1) * 12 * 100
+            units = engine.refine(
+                evaluate, math.ceil(rate * unit), low, high, self.target
+            )
+        else:
+            units = engine.seek(
+                evaluate, low, high, self.target, GOAL_SEEK_BATCH_SIZE
+            )
+        if units is None:
+            return None
+        return self.deposit(periods, self.amount, units / unit)
+
+    def solve_amount(
+        self, periods: int, amount_handler: AmountHandler
+    ) -> CompoundInterestCalculator | None:
+        """Deposit with the lowest initial amount reaching the target. """
+        low, high = M["amount"].ge, M["amount"].le
+
+        def evaluate(amounts: np.ndarray) -> np.ndarray:
+            return self.balances(
+                amounts, self.rate, periods, amount_handler
+            )[:, -1]
+
+        if engine.supports(amount_handler):
+            # amount * (1 + rate / 12 / 100) ** periods * scales = target
+            growth = (1 + self.rate / 12 / 100) ** periods * self.scales(
+                periods, amount_handler
+            )
+            amount = engine.refine(
+                evaluate, math.ceil(self.target / growth), low, high,
+                self.target
+            )
+        else:
+            amount = engine.seek(
+                evaluate, low, high, self.target, GOAL_SEEK_BATCH_SIZE
+            )
+        if amount is None:
+            return None
+        return self.deposit(periods, amount, self.rate)
+
+    def solve_periods(
+        self, periods: int, amount_handler: AmountHandler
+    ) -> CompoundInterestCalculator | None:
+        """
+        Deposit with the shortest term reaching the target: the first
+        month of the longest term's schedule at or above the target.
+        """
+        schedule = self.balances(
+            self.amount, self.rate, periods, amount_handler
+        )[0]
+        reached = np.flatnonzero(schedule >= self.target)
+        if not len(reached):
+            return None
+        return self.deposit(int(reached[0]) + 1, self.amount, self.rate)
+
+    def solve_goal(
+        self, amount_handler: AmountHandler = BypassAmountHandler()
+    ) -> CompoundInterestCalculator:
+        """
+        Solve the unknown parameter within METADATA bounds: in closed
+        form for the amount handlers with no cents logic, verified
+        against the rounded balances, otherwise by the bracketed
+        bisection over the batched schedule evaluator.
+        Raises `RequestValidationError` if the goal can't be solved.
+        """
+        for field in GOAL_SEEK_KNOWNS[self.solve]:
+            if getattr(self, field) is None:
+                raise goal_error(
+                    field, f"Field required to solve {self.solve}"
+                )
+
+        horizon = self.horizon()
+        if self.solve == Unknown.PERIODS:
+            horizon = min(horizon, M["periods"].le)
+        if not M["periods"].ge <= horizon <= M["periods"].le:
+            raise goal_error(
+                "by",
+                f"Term should be from {M["periods"].ge} "
+                f"to {M["periods"].le} months"
+            )
+
+        solver = {
+            Unknown.RATE   : self.solve_rate,
+            Unknown.AMOUNT : self.solve_amount,
+            Unknown.PERIODS: self.solve_periods
+        }[self.solve]
+        with metrics.stage("goal_seek"):
+            deposit = solver(horizon, amount_handler)
+        if deposit is None:
+            raise goal_error(
+                "target", "Target balance isn't reachable within the bounds"
+            )
+        return deposit
+
+
+# batch of deposits to calculate in a single request
+CalculatorsBatch = Annotated[
+    list[CompoundInterestCalculator],
+    Field(min_length=1, max_length=BATCH_SIZE_MAX)
+]
+
+
+async def chart_link(
+    request: Request,
+    schedule: dict,
+    chart_format: ChartFormat = ChartFormat.PNG,
+    plotter_class: type[Plotter] = Plotter
+) -> str | None:
+    """
+    Link of the schedule's chart plotted by the plotter class: chart
+    is rendered and uploaded off the event loop. In lazy charts mode
+    chart links to the app's route and is rendered on the first download.
+    There's no chart if `chart_format` is `none`, or if the renderer
+    is overloaded and RENDER_OVERLOAD is "skip".
+    """
+    if chart_format == ChartFormat.NONE:
+        return None
+
+    if LAZY_CHARTS:
+        key = plotter_class.defer(schedule, chart_format)
+        url = None
+    else:
+        key = chart_key(schedule, chart_format)
+        try:
+            url = await plotter_class.chart_url(schedule, chart_format)
+        except RenderRejected:
+            if RENDER_OVERLOAD == "skip":
+                return None
+            raise
+
+    # chart is served by the app
+    if url is None:
+        url = str(request.url_for("download_chart", key=key))
+    return url
+
+
+async def interest_response(
+    request: Request,
+    monthly_schedule: dict[str, float],
+    chart_format: ChartFormat = ChartFormat.PNG
+) -> dict[str, dict[str, float] | str | None]:
+    """
+    Response of the deposit's schedule with the link of its chart,
+    see `chart_link`.
+    """
+    return {
+        "data" : monthly_schedule,
+        "chart": await chart_link(request, monthly_schedule, chart_format)
+    }
+
+
+async def goal_response(
+    request: Request,
+    goal: GoalSeek,
+    amount_handler: AmountHandler,
+    chart_format: ChartFormat
+) -> dict[str, dict | str | None]:
+    """
+    Solved deposit, ready to be posted to the interactive endpoint,
+    with its schedule and chart.
+    """
+    deposit = goal.solve_goal(amount_handler)
+    return {
+        "deposit": {
+            "date"   : str(deposit.date),
+            "periods": deposit.periods,
+            "amount" : deposit.amount,
+            "rate"   : deposit.rate
+        },
+        **await interest_response(
+            request, deposit.calculate_schedule(amount_handler), chart_format
+        )
+    }
+
+
+async def grid_response(
+    request: Request,
+    grid: SensitivityGrid,
+    amount_handler: AmountHandler,
+    chart_format: ChartFormat,
+    schedules: bool
+) -> dict[str, list | str | None]:
+    """
+    Sensitivity grid's final balances with a single heatmap chart,
+    and the longest term's schedule per rate if `schedules` is `true`.
+    """
+    data, rate_schedules = grid.calculate_grid(amount_handler)
+    return {
+        **data,
+        "schedules": rate_schedules if schedules else None,
+        "chart"    : await chart_link(
+            request, data, chart_format, HeatmapPlotter
+        )
+    }
+
+
+async def interest_responses(
+    request: Request,
+    calculators: list[CompoundInterestCalculator],
+    amount_handler: AmountHandler,
+    chart_format: ChartFormat
+) -> list[dict[str, dict[str, float] | str | None]]:
+    """
+    Responses of a batch of deposits, charts are rendered concurrently
+    a few at a time, see `ChartRenderer.batch`. The first failed chart,
+    e.g. rejected by the overloaded renderer, cancels the rest.
+    """
+    schedules = CompoundInterestCalculator.calculate_schedules(
+        calculators, amount_handler
+    )
+    try:
+        with renderer.batch():
+            async with asyncio.TaskGroup() as group:
+                tasks = [
+                    group.create_task(interest_response(
+                        request, monthly_schedule, chart_format
+                    ))
+                    for monthly_schedule in schedules
+                ]
+    except ExceptionGroup as errors:
+        raise errors.exceptions[0]
+    return [task.result() for task in tasks]
 
 
 @app.get("/", status_code=STATUS_OK)
@@ -183,25 +1344,258 @@ async def redirect_from_root_to_docs():
     return RedirectResponse(url="/docs")
 
 
+@app.get("/ready", status_code=STATUS_OK)
+async def readiness():
+    """Readiness probe: app is ready once the startup warm-up is done. """
+    if not getattr(app.state, "ready", False):
+        raise HTTPException(
+            status_code=STATUS_UNAVAILABLE, detail="Warming up"
+        )
+    return {"ready": True}
+
+
+@app.get(
+    "/metrics",
+    status_code=STATUS_OK,
+    response_class=Response,
+    responses={STATUS_OK: {"content": {CONTENT_TYPE_LATEST: {}}}}
+)
+async def prometheus_metrics():
+    """
+    Prometheus metrics: duration of the request processing stages
+    by endpoint, validation failures and renders in flight.
+    """
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/stats", status_code=STATUS_OK)
+async def stats():
+    """
+    Hit rate and counters of the memoized schedules and their states,
+    of the local index of uploaded charts and of the lazy charts mode's
+    cache.
+    """
+    return {
+        "schedules"  : schedule_cache.stats(),
+        "states"     : schedule_states.stats(),
+        "charts"     : chart_index.stats(),
+        "lazy_charts": lazy_charts.stats()
+    }
+
+
+@app.get(
+    "/charts/{key}",
+    status_code=STATUS_OK,
+    response_class=Response,
+    responses={
+        STATUS_OK: {
+            "content": {
+                ChartFormat.PNG.media_type: {},
+                ChartFormat.SVG.media_type: {}
+            }
+        }
+    }
+)
+async def download_chart(key: str):
+    """
+    Chart of the lazy charts mode, rendered on the first download,
+    or the chart kept by the storage. Keys other than charts' ones
+    are never looked up, e.g. other objects of the S3 bucket.
+    """
+    if CHART_KEY_PATTERN.fullmatch(key) is None:
+        raise HTTPException(status_code=404, detail="Chart not found")
+
+    plotter = await Plotter.deferred_chart(key)
+    if plotter is None:
+        response = await uploader.run(storage.response, key)
+        if response is None:
+            raise HTTPException(status_code=404, detail="Chart not found")
+        return response
+    return Response(
+        content=plotter.body.getvalue(),
+        media_type=plotter.chart_format.media_type,
+        headers={"Cache-Control": f"private, max-age={S3_URL_LIFESPAN}"}
+    )
+
+
 @app.post("/standard", status_code=STATUS_OK)
 async def standard_interest_scenario(
-    calculator: CompoundInterestCalculator
+    request: Request,
+    calculator: CompoundInterestCalculator,
+    chart_format: ChartFormat = ChartFormat.PNG,
+    response_format: ResponseFormat = Depends(negotiate_format)
 ):
     """Standard scenario of interest accumulation. """
-    return calculator.calculate_interest()
+    content = await interest_response(
+        request, calculator.calculate_schedule(), chart_format
+    )
+    return format_response(content, response_format)
+
+
+@app.post("/standard/batch", status_code=STATUS_OK)
+async def standard_interest_scenario_batch(
+    request: Request,
+    calculators: CalculatorsBatch,
+    chart: bool = True,
+    chart_format: ChartFormat = ChartFormat.PNG,
+    response_format: ResponseFormat = Depends(negotiate_format)
+):
+    """
+    Standard scenario of interest accumulation for a batch of deposits.
+    Charts are skipped for the whole batch if `chart` is `false`.
+    """
+    content = await interest_responses(
+        request,
+        calculators,
+        BypassAmountHandler(),
+        chart_format if chart else ChartFormat.NONE
+    )
+    return format_response(content, response_format)
+
+
+@app.post("/standard/stream", status_code=STATUS_OK)
+async def standard_interest_scenario_stream(
+    calculator: LongHorizonCalculator,
+    granularity: Granularity = Granularity.MONTH,
+    response_format: ResponseFormat = Depends(negotiate_format)
+):
+    """
+    Standard scenario of interest accumulation for long horizons,
+    streamed as NDJSON rows with no chart.
+    """
+    return stream_response(
+        calculator, BypassAmountHandler(), granularity, response_format
+    )
+
+
+@app.post("/standard/grid", status_code=STATUS_OK)
+async def standard_interest_scenario_grid(
+    request: Request,
+    grid: SensitivityGrid,
+    chart_format: ChartFormat = ChartFormat.PNG,
+    schedules: bool = False
+):
+    """
+    Standard scenario of interest accumulation for every rate and term
+    of the ranges: final balances, a row of terms per rate, plotted
+    as a single heatmap. The longest term's schedules per rate, whose
+    prefixes are the shorter terms' schedules, are added if `schedules`
+    is `true`.
+    """
+    content = await grid_response(
+        request, grid, BypassAmountHandler(), chart_format, schedules
+    )
+    return ORJSONResponse(content)
+
+
+@app.post("/standard/goal", status_code=STATUS_OK)
+async def standard_interest_scenario_goal(
+    request: Request,
+    goal: GoalSeek,
+    chart_format: ChartFormat = ChartFormat.NONE
+):
+    """
+    Standard scenario's goal seek: the lowest rate, the lowest initial
+    amount or the shortest term reaching the target balance by the date.
+    Chart of the solved deposit is skipped unless `chart_format` is set.
+    """
+    content = await goal_response(
+        request, goal, BypassAmountHandler(), chart_format
+    )
+    return ORJSONResponse(content)
+
+
+def make_summer_bonus() -> AmountHandler:
+    """Amount handler of the special scenario. """
+    return FloorAmountHandler(
+        start_date="01.06.2021",
+        end_date="31.08.2021",
+        scale=1.05
+    )
 
 
 @app.post("/special", status_code=STATUS_OK)
 async def special_interest_scenario(
-    calculator: CompoundInterestCalculator
+    request: Request,
+    calculator: CompoundInterestCalculator,
+    chart_format: ChartFormat = ChartFormat.PNG,
+    response_format: ResponseFormat = Depends(negotiate_format)
 ):
     """
     Special scenario of interest accumulation:
     5% bonus to the balance in the summer months of 2021.
     """
-    summer_bonus = FloorAmountHandler(
-        start_date="01.06.2021",
-        end_date="31.08.2021",
-        scale=1.05
+    content = await interest_response(
+        request,
+        calculator.calculate_schedule(make_summer_bonus()),
+        chart_format
+    )
+    return format_response(content, response_format)
+
+
+@app.post("/special/batch", status_code=STATUS_OK)
+async def special_interest_scenario_batch(
+    request: Request,
+    calculators: CalculatorsBatch,
+    chart: bool = True,
+    chart_format: ChartFormat = ChartFormat.PNG,
+    response_format: ResponseFormat = Depends(negotiate_format)
+):
+    """
+    Special scenario of interest accumulation for a batch of deposits.
+    Charts are skipped for the whole batch if `chart` is `false`.
+    """
+    content = await interest_responses(
+        request,
+        calculators,
+        make_summer_bonus(),
+        chart_format if chart else ChartFormat.NONE
+    )
+    return format_response(content, response_format)
+
+
+@app.post("/special/stream", status_code=STATUS_OK)
+async def special_interest_scenario_stream(
+    calculator: LongHorizonCalculator,
+    granularity: Granularity = Granularity.MONTH,
+    response_format: ResponseFormat = Depends(negotiate_format)
+):
+    """
+    Special scenario of interest accumulation for long horizons,
+    streamed as NDJSON rows with no chart.
+    """
+    return stream_response(
+        calculator, make_summer_bonus(), granularity, response_format
+    )
+
+
+@app.post("/special/grid", status_code=STATUS_OK)
+async def special_interest_scenario_grid(
+    request: Request,
+    grid: SensitivityGrid,
+    chart_format: ChartFormat = ChartFormat.PNG,
+    schedules: bool = False
+):
+    """
+    Special scenario of interest accumulation for every rate and term
+    of the ranges, see /standard/grid.
+    """
+    content = await grid_response(
+        request, grid, make_summer_bonus(), chart_format, schedules
+    )
+    return ORJSONResponse(content)
+
+
+@app.post("/special/goal", status_code=STATUS_OK)
+async def special_interest_scenario_goal(
+    request: Request,
+    goal: GoalSeek,
+    chart_format: ChartFormat = ChartFormat.NONE
+):
+    """
+    Special scenario's goal seek, see /standard/goal.
+    """
+    content = await goal_response(
+        request, goal, make_summer_bonus(), chart_format
     )
-    return calculator.calculate_interest(summer_bonus)
+    return ORJSONResponse(content)
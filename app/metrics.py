@@ -0,0 +1,87 @@
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .settings import METRICS_BUCKETS, METRICS_NAMESPACE
+
+
+# endpoint of the request being processed, label of the metrics
+endpoint: ContextVar[str] = ContextVar("endpoint", default="other")
+
+STAGE_DURATION = Histogram(
+    name="stage_duration_seconds",
+    documentation="Duration of the request processing stage, seconds",
+    labelnames=["endpoint", "stage"],
+    namespace=METRICS_NAMESPACE,
+    buckets=METRICS_BUCKETS
+)
+VALIDATION_FAILURES = Counter(
+    name="validation_failures",
+    documentation="Requests failed due to invalid input data",
+    labelnames=["endpoint"],
+    namespace=METRICS_NAMESPACE
+)
+RENDERS_IN_FLIGHT = Gauge(
+    name="renders_in_flight",
+    documentation="Charts being plotted or waiting for a renderer's worker",
+    namespace=METRICS_NAMESPACE
+)
+RENDERS_REJECTED = Counter(
+    name="renders_rejected",
+    documentation="Charts not plotted as the renderer's queue was full",
+    namespace=METRICS_NAMESPACE
+)
+RENDER_MEMORY_RESERVED = Gauge(
+    name="render_memory_reserved_bytes",
+    documentation="Estimated raster memory of the charts being plotted",
+    namespace=METRICS_NAMESPACE
+)
+
+
+def observe(stage_name: str, seconds: float) -> None:
+    """Observe duration of the stage of the current endpoint's request. """
+    STAGE_DURATION.labels(endpoint=endpoint.get(), stage=stage_name).observe(
+        seconds
+    )
+
+
+@contextmanager
+def stage(stage_name: str) -> Iterator[None]:
+    """Observe duration of the block as the stage of the request. """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage_name, time.perf_counter() - start)
+
+
+class EndpointMiddleware:
+    """
+    ASGI middleware to label metrics of the request with its endpoint.
+    Paths with parameters, e.g. /charts/{key}, are labeled as "other",
+    so the number of labels is bounded by the number of routes.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.paths: set[str] | None = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        if self.paths is None:
+            self.paths = {
+                route.path for route in scope["app"].routes
+                if "{" not in route.path
+            }
+        path = scope["path"]
+        token = endpoint.set(path if path in self.paths else "other")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            endpoint.reset(token)
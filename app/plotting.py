@@ -0,0 +1,160 @@
+import io
+import threading
+from functools import lru_cache
+
+import matplotlib
+import matplotlib.style
+import mplcyberpunk  # registers the cyberpunk style
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import LinearSegmentedColormap, to_rgba
+from matplotlib.figure import Figure
+from matplotlib.transforms import Bbox
+
+from .settings import METADATA, MPL_RUNTIME_CONFIG, MPL_STYLE
+from .tools import chart_figsize, clamp, heatmap_figsize
+
+
+# charts are plotted with the object-oriented API on Anti-Grain Geometry
+# canvases, pyplot's global state and GUI backends are never involved
+# https://matplotlib.org/stable/users/explain/figure/backends.html#backends
+matplotlib.rcParams.update(MPL_RUNTIME_CONFIG)
+matplotlib.style.use(MPL_STYLE)
+
+
+class ChartTemplate:
+    """
+    Pre-built figure of the PNG chart with a fixed number of bars.
+    Rendering only updates bar heights, labels and ticks' text, and saves
+    the figure with a precomputed bounding box, i.e. with a single draw.
+    Figure is built with the object-oriented API, so templates of
+    different sizes are safe to render in parallel threads.
+    """
+
+    def __init__(self, data_size: int) -> None:
+        self.lock = threading.Lock()
+
+        self.figure = Figure(figsize=chart_figsize(data_size))
+        self.ax = ax = self.figure.subplots()
+
+        # plot bars to be replaced with gradients like in
+        # mplcyberpunk.add_bar_gradient, and add amount labels
+        positions = range(data_size)
+        bars = ax.bar(positions, [1] * data_size, color="C3")
+        self.labels = ax.bar_label(bars, fmt="%.2f")
+        color = bars[0].get_facecolor()
+        cmap = LinearSegmentedColormap.from_list(
+            "gradient_cmap", [(*color[:3], 0), color]
+        )
+        ax.axis()  # freeze axis limits before calling imshow
+        ax.autoscale(False)
+        self.gradients = []
+        for bar in bars:
+            x, width = bar.get_x(), bar.get_width()
+            self.gradients.append(ax.imshow(
+                X=[[1, 1], [0, 0]],  # pseudo-image
+                extent=(x, x + width, 0, 1),
+                cmap=cmap,
+                zorder=bar.zorder,
+                interpolation="bicubic",
+                aspect="auto"
+            ))
+            bar.remove()
+
+        # add xticks and title
+        ax.set_xticks(positions)
+        ax.tick_params(axis="x", labelrotation=90, pad=-55)
+        ax.set_axisbelow(True)
+        title_size = clamp(data_size * 3, low=15, high=72, warn=False)
+        ax.set_title("Deposit balance progress", size=title_size)
+
+        # tight bounding box fitting both the narrowest and the widest
+        # amounts, so the box is never recomputed with an extra draw
+        self.bbox = Bbox.union([
+            self._tight_bbox([METADATA["amount"].ge] * data_size),
+            self._tight_bbox([METADATA["amount"].le * 1.5] * data_size)
+        ])
+
+    def _tight_bbox(self, amounts: list[float]) -> Bbox:
+        """Bounding box of the figure with `amounts`, inches. """
+        self._update(["00.00.0000"] * len(amounts), amounts)
+        FigureCanvasAgg(self.figure)
+        renderer = self.figure.canvas.get_renderer()
+        return self.figure.get_tightbbox(renderer).padded(
+            matplotlib.rcParams["savefig.pad_inches"]
+        )
+
+    def _update(self, dates: list[str], amounts: list[float]) -> None:
+        """Set bar heights, amount labels and ticks' text. """
+        self.ax.set_ylim(0, max(amounts) * 1.05)
+        label_size = 9 if amounts[0] < 100_000 else 8
+        for gradient, label, amount in zip(
+            self.gradients, self.labels, amounts
+        ):
+            left, right, *_ = gradient.get_extent()
+            gradient.set_extent((left, right, 0, amount))
+            label.xy = (label.xy[0], amount)
+            label.set_text(f"{amount:.2f}")
+            label.set_fontsize(label_size)
+        self.ax.set_xticklabels(dates)
+
+    def render(self, schedule: dict[str, float]) -> bytes:
+        """Render chart for provided interest schedule as png bytes. """
+        body = io.BytesIO()
+        with self.lock:
+            self._update(list(schedule), list(schedule.values()))
+            # fresh canvas per render: raster buffer of the previous one
+            # is freed instead of being kept by the template
+            FigureCanvasAgg(self.figure)
+            self.figure.savefig(body, bbox_inches=self.bbox, format="png")
+            FigureCanvasAgg(self.figure)
+        return body.getvalue()
+
+
+@lru_cache(maxsize=METADATA["periods"].le)
+def chart_template(data_size: int) -> ChartTemplate:
+    """Pre-built PNG chart template with `data_size` bars. """
+    return ChartTemplate(data_size)
+
+
+def render_heatmap(grid: dict[str, list]) -> bytes:
+    """
+    Render heatmap of the final balances for provided sensitivity grid
+    as png bytes: rates are rows from the lowest up, terms are columns.
+    Figure is built per render, grids are rarely plotted twice.
+    """
+    rates, periods, balances = grid["rates"], grid["periods"], grid["data"]
+    figure = Figure(figsize=heatmap_figsize(len(rates), len(periods)))
+    ax = figure.subplots()
+
+    # gradient from the axes background to the bar color of the charts
+    cmap = LinearSegmentedColormap.from_list(
+        "heatmap_cmap", [ax.get_facecolor(), to_rgba("C3")]
+    )
+    image = ax.imshow(
+        balances, cmap=cmap, origin="lower", aspect="auto",
+        interpolation="nearest"
+    )
+    figure.colorbar(image, ax=ax, label="Final balance")
+
+    # balance labels, dark ones over the bright cells
+    low, high = image.norm.vmin, image.norm.vmax
+    for row, row_balances in enumerate(balances):
+        for column, balance in enumerate(row_balances):
+            bright = high > low and (balance - low) / (high - low) > 0.5
+            ax.text(
+                column, row, f"{balance:.0f}",
+                ha="center", va="center", fontsize=7,
+                color=ax.get_facecolor() if bright else None
+            )
+
+    ax.set_xticks(range(len(periods)), [str(term) for term in periods])
+    ax.set_yticks(range(len(rates)), [f"{rate:g}" for rate in rates])
+    ax.set_xlabel("Term, months")
+    ax.set_ylabel("Annual rate, %")
+    ax.grid(False)
+    ax.set_title("Final balance by rate and term", size=15)
+
+    body = io.BytesIO()
+    FigureCanvasAgg(figure)
+    figure.savefig(body, bbox_inches="tight", format="png")
+    return body.getvalue()
@@ -0,0 +1,86 @@
+import asyncio
+import cProfile
+import os
+import re
+import uuid
+from urllib.parse import parse_qs
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .settings import PROFILING, PROFILING_DIR
+
+
+# request's header or query flag to profile the request
+PROFILE_HEADER: str = "x-profile"
+PROFILE_PARAM: str = "profile"
+
+# client's request id names the profile, unless it's not a safe file name
+REQUEST_ID_HEADER: str = "x-request-id"
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def profile_requested(scope: Scope) -> bool:
+    """Check if the request asks to be profiled. """
+    headers = dict(scope["headers"])
+    if headers.get(PROFILE_HEADER.encode(), b"").decode() in ("1", "true"):
+        return True
+    query = parse_qs(scope["query_string"].decode())
+    return query.get(PROFILE_PARAM, [""])[-1] in ("1", "true")
+
+
+def request_id(scope: Scope) -> str:
+    """Client's request id if it's a safe file name, random one otherwise. """
+    value = dict(scope["headers"]).get(REQUEST_ID_HEADER.encode(), b"")
+    value = value.decode("latin-1")
+    if REQUEST_ID_PATTERN.fullmatch(value):
+        return value
+    return uuid.uuid4().hex
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware to run the request flagged by the X-Profile header
+    or `profile` query parameter under the deterministic profiler.
+    Profile is written to PROFILING_DIR as {request id}.prof in `pstats`
+    format and its request id is returned in the X-Request-ID header.
+
+    Debug only, off unless PROFILING is set. Profiler sees everything
+    the event loop runs during the request, including concurrent requests,
+    but neither renderer's processes nor uploader's threads. Only one
+    request is profiled at a time, others flagged meanwhile are served
+    as usual.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.lock = asyncio.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            not PROFILING
+            or scope["type"] != "http"
+            or not profile_requested(scope)
+            or self.lock.locked()
+        ):
+            return await self.app(scope, receive, send)
+
+        async with self.lock:
+            profile_id = request_id(scope)
+
+            async def send_with_id(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers[REQUEST_ID_HEADER] = profile_id
+                await send(message)
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_with_id)
+            finally:
+                profiler.disable()
+                os.makedirs(PROFILING_DIR, exist_ok=True)
+                profiler.dump_stats(
+                    os.path.join(PROFILING_DIR, f"{profile_id}.prof")
+                )
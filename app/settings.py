@@ -1,6 +1,8 @@
+import os
 from collections import namedtuple
 from typing import Any
 
+from decouple import Choices, config
 from fastapi import status
 
 
@@ -25,15 +27,113 @@ METADATA: dict[str, Metadata] = {
     "rate"   : Metadata(ge=1,      le=8)
 }
 
+# maximum investment length of the streaming endpoints, months (50 years)
+STREAM_PERIODS_MAX: int = 600
+
+# maximum number of cached accrual calendars and parsed dates
+CALENDAR_CACHE_SIZE: int = 4096
+
+# memoized schedules: maximum number of schedules and lifespan
+# of the entry, seconds
+SCHEDULE_CACHE_SIZE: int = 10_000
+SCHEDULE_CACHE_TTL: float = 3600
+
+# minimum number of deposits to calculate floor cents schedules in integer
+# cents: the engine steps month by month over the whole batch, smaller
+# batches are faster in the plain monthly loop
+FLOOR_ENGINE_BATCH_MIN: int = 4
+
+# maximum number of deposits in a single batch request
+BATCH_SIZE_MAX: int = 10_000
+
+# maximum number of rates or terms along the sensitivity grid's axis
+GRID_AXIS_SIZE_MAX: int = 60
+
+# goal seek: decimal places of the solved rate and number of candidates
+# evaluated in a single batch by the bisection of the floor cents handlers
+GOAL_SEEK_RATE_DECIMALS: int = 4
+GOAL_SEEK_BATCH_SIZE: int = 64
+
 # matplotlib settings
 MPL_RUNTIME_CONFIG: dict[str, Any] = {
     "axes.titlepad": 15,
     "figure.dpi"   : 300
 }
+MPL_STYLE: str = "cyberpunk"
+
+# charts rendering process pool: number of worker processes, number
+# of renders waiting for a free worker and workers' start method;
+# no workers means charts are rendered in-place, on the event loop
+RENDER_WORKERS: int = config(
+    "RENDER_WORKERS", default=max(1, (os.cpu_count() or 1) - 1), cast=int
+)
+RENDER_QUEUE_SIZE: int = config("RENDER_QUEUE_SIZE", default=64, cast=int)
+RENDER_START_METHOD: str = config("RENDER_START_METHOD", default="spawn")
+
+# charts rendering admission control: budget of the raster buffers
+# of the renders in progress, bytes, estimated as the figure's pixels
+# times bytes per pixel (RGBA buffer and its copies while saving);
+# renders exceeding the queue are rejected with 503 Service Unavailable
+# and Retry-After, seconds, or, if RENDER_OVERLOAD is "skip" rather than
+# "retry", responses go without a chart
+RENDER_MEMORY_BUDGET: int = config(
+    "RENDER_MEMORY_BUDGET", default=2 * 1024 ** 3, cast=int
+)
+RENDER_BYTES_PER_PIXEL: int = 8
+RENDER_RETRY_AFTER: int = config("RENDER_RETRY_AFTER", default=5, cast=int)
+RENDER_OVERLOAD: str = config(
+    "RENDER_OVERLOAD", default="retry", cast=Choices(["retry", "skip"])
+)
+
+# charts uploading thread pool: number of threads (and S3 connections),
+# number of uploads waiting for a free thread; S3 requests' timeouts,
+# seconds, and maximum number of attempts including retries
+S3_UPLOAD_WORKERS: int = config("S3_UPLOAD_WORKERS", default=16, cast=int)
+S3_UPLOAD_QUEUE_SIZE: int = config(
+    "S3_UPLOAD_QUEUE_SIZE", default=64, cast=int
+)
+S3_CONNECT_TIMEOUT: float = 5
+S3_READ_TIMEOUT: float = 30
+S3_MAX_ATTEMPTS: int = 3
+
+# storage of the rendered charts: "s3" bucket configured by S3_* variables,
+# "local" directory or "memory" of the app's process, charts of the latter
+# two are served by the app's /charts/{key} route; maximum number of charts
+# kept in memory
+CHART_STORAGE: str = config("CHART_STORAGE", default="s3")
+CHART_STORAGE_DIR: str = config("CHART_STORAGE_DIR", default="charts")
+CHART_MEMORY_SIZE: int = 1024
 
 # lifespan of a link to a deposit balance progress chart, seconds
 S3_URL_LIFESPAN: int = 180
 
+# lazy charts mode: endpoints link charts to the app's /charts/{key} route,
+# chart is rendered on the first download and kept for S3_URL_LIFESPAN;
+# maximum number of charts pending or kept in memory
+LAZY_CHARTS: bool = config("LAZY_CHARTS", default=False, cast=bool)
+LAZY_CHARTS_SIZE: int = 256
+
+# local index of uploaded charts: maximum number of charts and lifespan
+# of the entry, seconds; charts already in the bucket aren't re-uploaded
+CHART_INDEX_SIZE: int = 10_000
+CHART_INDEX_TTL: float = 3600
+
+# Prometheus metrics: prefix of the metrics' names and upper bounds
+# of the stage duration histogram's buckets, seconds
+METRICS_NAMESPACE: str = "compound_interest"
+METRICS_BUCKETS: tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5,
+    1, 2.5, 5, 10
+)
+
+# debug only: requests flagged by X-Profile header or `profile` query
+# parameter are profiled, profiles are written to the directory
+PROFILING: bool = config("PROFILING", default=False, cast=bool)
+PROFILING_DIR: str = config("PROFILING_DIR", default="profiles")
+
 # thresholds to dynamically clamp amount handler's scale factor;
 # use scale < 1 to implement taxes
 SCALE_MIN: float = 0.5
@@ -43,3 +143,5 @@ SCALE_MAX: float = 1.2
 STATUS_OK : int = status.HTTP_200_OK
 # app fails due to invalid input data
 STATUS_NOK: int = status.HTTP_400_BAD_REQUEST
+# app isn't ready yet or is overloaded, retry later
+STATUS_UNAVAILABLE: int = status.HTTP_503_SERVICE_UNAVAILABLE
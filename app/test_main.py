@@ -1,16 +1,44 @@
+import asyncio
+import io
+import json
+import math
+import os
+import pstats
+import random
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from itertools import product
 from functools import wraps
 from collections.abc import Callable
 
+import msgpack
+import numpy as np
+import pytest
 import requests
+from botocore.exceptions import ClientError
 from decouple import config
 
 # https://fastapi.tiangolo.com/tutorial/testing/#testing
 from fastapi.testclient import TestClient
+from prometheus_client.parser import text_string_to_metric_families
 
-from .main import app, custom_openapi
+# charts are kept in memory and served by the app unless storage is set,
+# so tests need no S3 credentials
+os.environ.setdefault("CHART_STORAGE", "memory")
+
+from .handlers import (
+    BypassAmountHandler, FloorAmountHandler, HandlerChain, DateTime,
+    accrual_calendar
+)
+from .main import app, custom_openapi, CompoundInterestCalculator
+from . import benchmark, engine, main, metrics, plotting, profiling, tools
+from .tools import Plotter, renderer
 from .settings import (
     DATE_FORMAT,
     METADATA as M,
+    STREAM_PERIODS_MAX,
     STATUS_OK, STATUS_NOK
 )
 
@@ -48,6 +76,16 @@ client = TestClient(app)
 # assert_nok = make_assert_decorator(STATUS_NOK, keys=["errors"])
 
 
+def get_chart(chart_url: str) -> requests.Response:
+    """
+    Download the chart from the app's route or from the S3_ENDPOINT_URL.
+    """
+    if chart_url.startswith(str(client.base_url)):
+        return client.get(chart_url)
+    assert chart_url.startswith(config("S3_ENDPOINT_URL"))
+    return requests.get(chart_url)
+
+
 def assert_ok(test: Callable) -> Callable:
     """Assertions that app is healthy and works well. """
     @wraps(test)
@@ -65,12 +103,8 @@ def assert_ok(test: Callable) -> Callable:
         # check if the interest schedule is as expected
         assert response_dict["data"] == expected_data
 
-        # check if the chart hosted on the S3_ENDPOINT_URL
-        chart_url = response_dict["chart"]
-        assert chart_url.startswith(config("S3_ENDPOINT_URL"))
-
         # check if the chart url is responsive and contains a png image
-        chart_response = requests.get(chart_url)
+        chart_response = get_chart(response_dict["chart"])
         assert chart_response.status_code == 200
         assert chart_response.headers["Content-Type"] == "image/png"
     return wrapper
@@ -712,6 +746,1186 @@ def test_special_endpoint():
     return response, expected
 
 
+def test_batch_endpoints():
+    """
+    Batch endpoints.
+    Each item matches its single deposit counterpart, charts are skipped.
+    """
+    deposits = [
+        {"date": "31.01.2021", "periods": 3, "amount": 10_000, "rate": 6},
+        {"date": "1.1.2021",   "periods": 1, "amount": 10_000, "rate": 1}
+    ]
+    for path in ("/standard", "/special"):
+        response = client.post(
+            url=f"{path}/batch",
+            params={"chart": False},
+            json=deposits
+        )
+        assert response.status_code == STATUS_OK
+
+        expected = [
+            {
+                "data" : client.post(url=path, json=deposit).json()["data"],
+                "chart": None
+            }
+            for deposit in deposits
+        ]
+        assert response.json() == expected
+
+
+@assert_nok
+def test_batch_invalid_items():
+    """
+    endpoint : standard/batch
+    errors   : grouped by index of the invalid item
+    """
+    response = client.post(
+        url="/standard/batch",
+        json=[
+            {"date": "31.01.2021", "periods": 12, "amount": 10_000, "rate": 6},
+            {"date": "31.11.2021", "periods": 12, "amount": 10_000, "rate": 6},
+            {"date": "31.01.2021", "periods": 0,  "amount": 10_000, "rate": 9}
+        ]
+    )
+    expected = {
+        "1": {
+            "date": "Value error, day is out of range for month"
+        },
+        "2": {
+            "periods": f"Input should be greater than or equal to {M["periods"].ge}",
+            "rate"   : f"Input should be less than or equal to {M["rate"].le}"
+        }
+    }
+    return response, expected
+
+
+@assert_nok
+def test_batch_empty():
+    """
+    endpoint : standard/batch
+    body     : empty batch
+    """
+    response = client.post(url="/standard/batch", json=[])
+    expected = {
+        "body": "List should have at least 1 item after validation, not 0"
+    }
+    return response, expected
+
+
+def test_stream_endpoints():
+    """
+    Streaming endpoints.
+    Monthly rows match the interactive endpoints, daily rows hold
+    the latest accrual's balance, horizon goes beyond METADATA.
+    """
+    deposit = {"date": "31.01.2021", "periods": 12, "amount": 10_000, "rate": 6}
+    for path in ("/standard", "/special"):
+        response = client.post(url=f"{path}/stream", json=deposit)
+        assert response.status_code == STATUS_OK
+        assert response.headers["content-type"] == "application/x-ndjson"
+
+        expected = client.post(
+            url=path, params={"chart_format": "none"}, json=deposit
+        ).json()["data"]
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert {row["date"]: row["amount"] for row in rows} == expected
+
+        response = client.post(
+            url=f"{path}/stream", params={"granularity": "day"}, json=deposit
+        )
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        # 31.01.2021 through 31.12.2021
+        assert len(rows) == 335
+        assert rows[0] == {"date": "31.01.2021", "amount": expected["31.01.2021"]}
+        assert rows[1] == {"date": "01.02.2021", "amount": expected["31.01.2021"]}
+        assert rows[28] == {"date": "28.02.2021", "amount": expected["28.02.2021"]}
+        assert rows[-1] == {"date": "31.12.2021", "amount": expected["31.12.2021"]}
+
+    long_deposit = {**deposit, "periods": STREAM_PERIODS_MAX}
+    response = client.post(url="/standard/stream", json=long_deposit)
+    assert len(response.text.splitlines()) == STREAM_PERIODS_MAX
+
+    response = client.post(
+        url="/standard/stream",
+        json={**deposit, "periods": STREAM_PERIODS_MAX + 1}
+    )
+    assert response.status_code == STATUS_NOK
+    assert response.json() == {
+        "errors": {
+            "periods": f"Input should be less than or equal to {STREAM_PERIODS_MAX}"
+        }
+    }
+
+    # horizon ends in year 9999 at the latest
+    late_deposit = {**long_deposit, "date": "31.01.9990"}
+    for params in ({}, {"format": "columns"}):
+        response = client.post(
+            url="/standard/stream", params=params, json=late_deposit
+        )
+        assert response.status_code == STATUS_NOK
+        assert response.json() == {
+            "errors": {
+                "periods": "Value error, Investment ends after the year 9999"
+            }
+        }
+    response = client.post(
+        url="/standard/stream", json={**late_deposit, "periods": 120}
+    )
+    assert json.loads(response.text.splitlines()[-1])["date"] == "31.12.9999"
+
+
+def test_grid_endpoints():
+    """
+    Grid endpoints.
+    Every cell matches the interactive endpoints' final balance,
+    grid is plotted as a single heatmap, ranges are validated.
+    """
+    grid = {
+        "date"   : "31.01.2021",
+        "amount" : 10_000,
+        "rate"   : {"start": 4, "stop": 8, "step": 2},
+        "periods": {"start": 6, "stop": 12, "step": 3}
+    }
+    for path in ("/standard", "/special"):
+        response = client.post(
+            url=f"{path}/grid",
+            params={"chart_format": "svg", "schedules": "true"},
+            json=grid
+        )
+        assert response.status_code == STATUS_OK
+        result = response.json()
+        assert result["rates"] == [4, 6, 8]
+        assert result["periods"] == [6, 9, 12]
+
+        for rate, row, schedule in zip(
+            result["rates"], result["data"], result["schedules"]
+        ):
+            for periods, balance in zip(result["periods"], row):
+                expected = client.post(
+                    url=path,
+                    params={"chart_format": "none"},
+                    json={
+                        "date"   : "31.01.2021",
+                        "periods": periods,
+                        "amount" : 10_000,
+                        "rate"   : rate
+                    }
+                ).json()["data"]
+                assert list(expected.values())[-1] == balance
+            assert schedule == expected
+
+        # a cell per rate and term
+        chart_response = get_chart(result["chart"])
+        assert chart_response.headers["Content-Type"] == "image/svg+xml"
+        svg = ET.fromstring(chart_response.content)
+        rects = svg.findall("{http://www.w3.org/2000/svg}rect")
+        assert len(rects) == 1 + 3 * 3
+
+    response = client.post(
+        url="/standard/grid", params={"chart_format": "none"}, json=grid
+    )
+    assert response.json()["schedules"] is None
+    assert response.json()["chart"] is None
+
+    response = client.post(
+        url="/standard/grid",
+        json={
+            **grid,
+            "rate"   : {"start": 8, "stop": 4},
+            "periods": {"start": 1, "stop": 61}
+        }
+    )
+    assert response.status_code == STATUS_NOK
+    assert response.json() == {
+        "errors": {
+            "rate"   : "Value error, Range's stop is less than its start",
+            "periods": {"stop": "Input should be less than or equal to 60"}
+        }
+    }
+
+    for step in (0.01, 1e-320):
+        response = client.post(
+            url="/standard/grid",
+            json={**grid, "rate": {"start": 1, "stop": 8, "step": step}}
+        )
+        assert response.json() == {
+            "errors": {"rate": "Value error, Range has more than 60 values"}
+        }
+
+    # JSON parser lets infinity through, the range doesn't
+    response = client.post(
+        url="/standard/grid",
+        content=json.dumps(
+            {**grid, "rate": {"start": 4, "stop": 8, "step": math.inf}}
+        ),
+        headers={"Content-Type": "application/json"}
+    )
+    assert response.status_code == STATUS_NOK
+    assert response.json() == {
+        "errors": {"rate": {"step": "Input should be a finite number"}}
+    }
+
+    response = client.post(
+        url="/standard/grid",
+        json={**grid, "date": "31.12.9999", "periods": {"start": 1, "stop": 2}}
+    )
+    assert response.json() == {
+        "errors": {
+            "periods": "Value error, Investment ends after the year 9999"
+        }
+    }
+
+
+def test_goal_endpoints():
+    """
+    Goal endpoints.
+    Solved deposit reaches the target on the interactive endpoint,
+    a unit less of the unknown doesn't; goal is validated.
+    """
+    units = {"rate": 0.0001, "amount": 1, "periods": 1}
+    for path, (solve, knowns), target in product(
+        ("/standard", "/special"),
+        (
+            ("rate",    {"amount": 10_000}),
+            ("amount",  {"rate": 6}),
+            ("periods", {"amount": 10_000, "rate": 6})
+        ),
+        (10_500, 11_111.11, 12_345.67)
+    ):
+        response = client.post(
+            url=f"{path}/goal",
+            json={
+                "solve" : solve,
+                "date"  : "31.01.2021",
+                "by"    : "31.12.2022",
+                "target": target,
+                **knowns
+            }
+        )
+        if response.status_code == STATUS_NOK:
+            assert response.json() == {
+                "errors": {
+                    "target": "Target balance isn't reachable within the bounds"
+                }
+            }
+            continue
+        assert response.status_code == STATUS_OK
+        result = response.json()
+        deposit = result["deposit"]
+        if solve != "periods":
+            assert deposit["periods"] == 24
+        assert {**deposit, **knowns} == deposit
+
+        def final_balance(deposit: dict) -> float:
+            return list(client.post(
+                url=path, params={"chart_format": "none"}, json=deposit
+            ).json()["data"].values())[-1]
+
+        assert final_balance(deposit) == list(result["data"].values())[-1]
+        assert final_balance(deposit) >= target
+        lower = {**deposit, solve: round(deposit[solve] - units[solve], 4)}
+        if lower[solve] >= M[solve].ge:
+            assert final_balance(lower) < target
+
+    goal = {"solve": "rate", "date": "31.01.2021", "by": "31.12.2021", "target": 12_000}
+    response = client.post(url="/standard/goal", json=goal)
+    assert response.status_code == STATUS_NOK
+    assert response.json() == {
+        "errors": {"amount": "Field required to solve rate"}
+    }
+
+    response = client.post(
+        url="/standard/goal",
+        json={**goal, "amount": 10_000, "by": "31.12.2031"}
+    )
+    assert response.json() == {
+        "errors": {"by": "Term should be from 1 to 60 months"}
+    }
+
+    # horizon ends in year 9999 at the latest
+    response = client.post(
+        url="/standard/goal",
+        json={
+            **goal,
+            "solve" : "periods",
+            "date"  : "31.12.9998",
+            "by"    : "31.12.9999",
+            "target": 10_500,
+            "amount": 10_000,
+            "rate"  : 8
+        }
+    )
+    assert response.status_code == STATUS_OK
+    assert response.json()["deposit"]["periods"] == 8
+
+
+def test_goal_seek():
+    """Bisection over the batched evaluator finds the least integer. """
+    def evaluate(candidates: np.ndarray) -> np.ndarray:
+        return candidates.astype(float) ** 2
+
+    for target in (0, 1, 2, 10_000, 10_001, 99_999_999_999):
+        expected = math.ceil(math.sqrt(target))
+        expected = expected if expected <= 100_000 else None
+        assert engine.seek(evaluate, 0, 100_000, target, 8) == expected
+        guess = int(math.sqrt(target))  # closed form, off by rounding
+        assert engine.refine(evaluate, guess, 0, 100_000, target) == expected
+
+
+def test_heatmap_chart():
+    """PNG heatmap is plotted in the renderer's pool. """
+    grid = {"rates": [4.0, 8.0], "periods": [6, 12], "data": [[1.0, 2.0], [3.0, 4.0]]}
+    body = asyncio.run(renderer.render(grid, tools.HeatmapPlotter))
+    assert body.startswith(b"\x89PNG")
+    assert body == tools.render_chart(grid, tools.HeatmapPlotter)
+
+
+def test_accrual_calendar():
+    """
+    Accrual calendar is month-end aware and cached.
+    """
+    date = DateTime.parse("31.01.2021")
+    assert DateTime.parse("31.01.2021") is date
+
+    calendar = accrual_calendar(date, 3)
+    assert calendar.keys == ("31.01.2021", "28.02.2021", "31.03.2021")
+    assert list(map(str, calendar.dates)) == list(calendar.keys)
+    assert accrual_calendar(date, 3) is calendar
+
+
+def test_vectorized_engine():
+    """
+    Vectorized engine matches the monthly loop bit for bit,
+    with and without floor cents logic.
+    """
+    rng = random.Random(1704)
+    calculators = [
+        CompoundInterestCalculator(
+            date=str(DateTime.fromordinal(rng.randint(730_120, 741_077))),
+            periods=rng.randint(M["periods"].ge, M["periods"].le),
+            amount=rng.randint(M["amount"].ge, M["amount"].le),
+            rate=round(rng.uniform(M["rate"].ge, M["rate"].le), 2)
+        )
+        for _ in range(200)
+    ]
+    handler_kwargs = (
+        {},
+        {"start_date": "01.06.2021", "end_date": "31.08.2023", "scale": 1.05}
+    )
+    for handler_class, kwargs in product(
+        (BypassAmountHandler, FloorAmountHandler), handler_kwargs
+    ):
+        amount_handler = handler_class(**kwargs)
+        expected = [
+            calculator.loop_schedule(amount_handler)
+            for calculator in calculators
+        ]
+        schedules = CompoundInterestCalculator.vectorized_schedules(
+            calculators, amount_handler
+        )
+        assert schedules == expected
+
+
+def test_schedule_cache(monkeypatch):
+    """
+    Schedules are memoized by deposit and amount handler's identity,
+    hits skip the calculation.
+    """
+    assert BypassAmountHandler() == BypassAmountHandler()
+    assert main.make_summer_bonus() == main.make_summer_bonus()
+    assert hash(main.make_summer_bonus()) == hash(main.make_summer_bonus())
+    assert main.make_summer_bonus() != FloorAmountHandler()
+    assert BypassAmountHandler() != FloorAmountHandler()
+
+    cache = tools.TTLCache(maxsize=2, ttl=60)
+    monkeypatch.setattr(main, "schedule_cache", cache)
+
+    calculators = [
+        CompoundInterestCalculator(
+            date="31.01.2021", periods=12, amount=10_000, rate=rate
+        )
+        for rate in (1, 2, 3)
+    ]
+    schedule = calculators[0].calculate_schedule(main.make_summer_bonus())
+    assert cache.stats()["misses"] == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached schedule is recalculated")
+
+    monkeypatch.setattr(CompoundInterestCalculator, "loop_schedule", fail)
+    assert calculators[0].calculate_schedule(main.make_summer_bonus()) is schedule
+    assert cache.stats()["hits"] == 1
+
+    CompoundInterestCalculator.calculate_schedules(calculators[1:])
+    stats = cache.stats()
+    assert (stats["misses"], stats["evictions"], stats["size"]) == (3, 1, 2)
+
+
+def test_schedule_states(monkeypatch):
+    """
+    Longer horizons resume from the cached state, what-if handlers
+    recalculate only the months of and after their validity period.
+    """
+    def fresh_caches():
+        for cache in ("schedule_cache", "schedule_states"):
+            monkeypatch.setattr(main, cache, tools.TTLCache(maxsize=8, ttl=60))
+
+    def schedule(periods, amount_handler):
+        calculator = CompoundInterestCalculator(
+            date="31.01.2021", periods=periods, amount=10_000, rate=6
+        )
+        return calculator.calculate_schedule(amount_handler)
+
+    fresh_caches()
+    expected = {
+        periods: schedule(periods, main.make_summer_bonus())
+        for periods in (12, 24)
+    }
+    fresh_caches()
+    unscaled = schedule(12, FloorAmountHandler())
+
+    months = []
+    handle_cents = FloorAmountHandler.handle_cents
+
+    def counting_handle_cents(amount: float) -> float:
+        months.append(amount)
+        return handle_cents(amount)
+
+    monkeypatch.setattr(
+        FloorAmountHandler, "handle_cents", staticmethod(counting_handle_cents)
+    )
+    # months before 01.06.2021 are shared with the unscaled schedule
+    assert schedule(12, main.make_summer_bonus()) == expected[12]
+    assert len(months) == 12 - 5
+
+    months.clear()
+    assert schedule(24, main.make_summer_bonus()) == expected[24]
+    assert len(months) == 24 - 12
+
+    months.clear()
+    assert schedule(6, FloorAmountHandler()) == dict(list(unscaled.items())[:6])
+    assert not months
+
+
+def test_handler_chain():
+    """
+    Handler chain multiplies amount by the scales of all handlers valid
+    on the date and handles cents once.
+    """
+    bonus = main.make_summer_bonus()
+    tax = FloorAmountHandler(
+        start_date="01.08.2021", end_date="31.12.2021", scale=0.87
+    )
+    chain = HandlerChain([bonus, tax], cents_handler=FloorAmountHandler)
+
+    for date, scale in (
+        ("31.05.2021", 1.0),
+        ("01.06.2021", 1.05),
+        ("31.07.2021", 1.05),
+        ("01.08.2021", 1.05 * 0.87),
+        ("31.08.2021", 1.05 * 0.87),
+        ("01.09.2021", 0.87),
+        ("31.12.2021", 0.87),
+        ("01.01.2022", 1.0)
+    ):
+        assert chain.scale_at(DateTime.parse(date)) == scale
+
+    calculator = CompoundInterestCalculator(
+        date="31.01.2021", periods=24, amount=10_000, rate=6
+    )
+    # single handler chain is the handler itself
+    assert calculator.loop_schedule(
+        HandlerChain([bonus], cents_handler=FloorAmountHandler)
+    ) == calculator.loop_schedule(bonus)
+
+    # compiled chain matches the chain applied month by month
+    expected = {
+        str(date): amount
+        for date, amount in calculator.iter_schedule(chain)
+    }
+    assert calculator.calculate_schedule(chain) == expected
+    assert chain == HandlerChain([bonus, tax], cents_handler=FloorAmountHandler)
+    assert chain.unscaled() == FloorAmountHandler()
+
+    # nested chain is flattened into its handlers
+    nested = HandlerChain(
+        [HandlerChain([bonus]), tax], cents_handler=FloorAmountHandler
+    )
+    assert nested == chain
+    assert calculator.loop_schedule(nested) == expected
+
+
+def test_custom_handler(monkeypatch):
+    """
+    Handler overriding `handle` alone isn't compiled: its schedule
+    is calculated, cached and resumed with its own logic.
+    """
+    for cache in ("schedule_cache", "schedule_states"):
+        monkeypatch.setattr(main, cache, tools.TTLCache(maxsize=8, ttl=60))
+
+    class Tax(FloorAmountHandler):
+        def handle(self, date: DateTime, amount: float) -> float:
+            return super().handle(date, amount * 0.99)
+
+    assert not Tax.compiles()
+    assert FloorAmountHandler.compiles() and HandlerChain.compiles()
+
+    def schedules(periods: int, amount_handler) -> tuple[dict, dict]:
+        calculator = CompoundInterestCalculator(
+            date="31.01.2021", periods=periods, amount=10_000, rate=6
+        )
+        return calculator.calculate_schedule(amount_handler), {
+            str(date): amount
+            for date, amount in calculator.iter_schedule(amount_handler)
+        }
+
+    summer_tax = Tax(start_date="01.06.2021", end_date="31.08.2021", scale=1.05)
+    schedules(12, FloorAmountHandler())
+    schedules(12, Tax())
+    for periods in (6, 12, 24):
+        for amount_handler in (Tax(), summer_tax):
+            calculated, expected = schedules(periods, amount_handler)
+            assert calculated == expected
+    assert calculated["31.01.2021"] == 9949.49
+
+    # goal seek's candidates aren't cached
+    states = main.schedule_states.stats()["size"]
+    goal = main.GoalSeek(
+        solve="rate", date="31.01.2021", by="31.12.2021", target=9_000,
+        amount=10_000
+    )
+    deposit = goal.solve_goal(Tax())
+    assert main.schedule_states.stats()["size"] == states
+    schedule = deposit.calculate_schedule(Tax())
+    assert list(schedule.values())[-1] >= 9_000
+
+
+def test_benchmark(monkeypatch):
+    """
+    Benchmark results are machine-readable and comparable between runs,
+    benchmark needs no S3 settings.
+    """
+    for name in list(os.environ):
+        if name.startswith("S3_"):
+            monkeypatch.delenv(name)
+    monkeypatch.setattr(benchmark, "storage", tools.S3ChartStorage())
+    assert not benchmark.local_storage()
+    assert benchmark.selects(["*/60"], "upload")
+    assert not benchmark.selects(["validation", "schedule/*"], "e2e")
+
+    report = benchmark.run(["validation", "schedule/special/1*"], repeat=2)
+    assert list(report["results"]) == [
+        "validation", "schedule/special/1", "schedule/special/12"
+    ]
+    for result in report["results"].values():
+        assert result["repeat"] == 2
+        assert 0 < result["min"] <= result["median"]
+    assert json.loads(json.dumps(report)) == report
+
+
+def test_orjson_responses():
+    """
+    Schedules are serialized by orjson into the very same JSON
+    as the standard library's compact one. Its speed against FastAPI's
+    default path is measured by the benchmark's "response/*" cases.
+    """
+    deposit = {"date": "31.01.2021", "periods": 60, "amount": 10_000, "rate": 6}
+    response = client.post(
+        url="/special", params={"chart_format": "none"}, json=deposit
+    )
+    assert response.status_code == STATUS_OK
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == json.dumps(
+        response.json(), separators=(",", ":"), ensure_ascii=False
+    ).encode()
+
+
+def test_response_formats():
+    """
+    Columnar schedules are negotiated by `format` parameter or Accept
+    header, the dict of dates remains the default.
+    """
+    deposit = {"date": "31.01.2021", "periods": 12, "amount": 10_000, "rate": 6}
+    for path in ("/standard", "/special"):
+        expected = client.post(
+            url=path, params={"chart_format": "none"}, json=deposit
+        ).json()["data"]
+        columns = {
+            "start"  : "31.01.2021",
+            "step"   : "month",
+            "amounts": list(expected.values())
+        }
+
+        for params, headers, media_type in (
+            ({"format": "columns"}, {}, "application/vnd.columns+json"),
+            ({}, {"Accept": "application/vnd.columns+json"},
+             "application/vnd.columns+json"),
+            ({}, {"Accept": "application/json;q=0.5, application/msgpack"},
+             "application/msgpack"),
+            ({"format": "msgpack"}, {"Accept": "application/json"},
+             "application/msgpack")
+        ):
+            response = client.post(
+                url=path,
+                params={"chart_format": "none", **params},
+                headers=headers,
+                json=deposit
+            )
+            assert response.status_code == STATUS_OK
+            assert response.headers["content-type"] == media_type
+            assert response.headers["vary"] == "Accept"
+            content = (
+                msgpack.unpackb(response.content)
+                if media_type == "application/msgpack" else response.json()
+            )
+            assert content == {"data": columns, "chart": None}
+
+        response = client.post(
+            url=f"{path}/batch",
+            params={"chart": "false", "format": "msgpack"},
+            json=[deposit, deposit]
+        )
+        assert msgpack.unpackb(response.content) == [
+            {"data": columns, "chart": None}
+        ] * 2
+
+        response = client.post(
+            url=f"{path}/stream",
+            params={"granularity": "day", "format": "columns"},
+            json=deposit
+        )
+        data = response.json()["data"]
+        assert (data["start"], data["step"]) == ("31.01.2021", "day")
+        assert len(data["amounts"]) == 335
+        assert data["amounts"][-1] == expected["31.12.2021"]
+
+    # unknown media types fall back to the default
+    response = client.post(
+        url="/standard",
+        params={"chart_format": "none"},
+        headers={"Accept": "text/html, */*;q=0.8"},
+        json=deposit
+    )
+    assert response.headers["content-type"] == "application/json"
+    assert "31.01.2021" in response.json()["data"]
+
+    response = client.post(
+        url="/standard", params={"format": "xml"}, json=deposit
+    )
+    assert response.status_code == STATUS_NOK
+    assert response.json() == {
+        "errors": {"format": "Input should be 'json', 'columns' or 'msgpack'"}
+    }
+
+
+def test_chart_renderer():
+    """
+    Charts are rendered in the renderer's process pool.
+    """
+    schedule = {"31.01.2021": 10050.0, "28.02.2021": 10100.25}
+    body = asyncio.run(renderer.render(schedule))
+    assert body.startswith(b"\x89PNG")
+    assert renderer.pool is not None
+
+    # pool is restarted on demand after shutdown
+    renderer.shutdown()
+    assert renderer.pool is None
+    assert asyncio.run(renderer.render(schedule)) == body
+
+
+def test_render_admission():
+    """
+    Renders start within the workers and memory budget, wait in order
+    in the bounded queue, the rest is rejected at once.
+    """
+    assert Plotter.raster_bytes({str(day): 1.0 for day in range(60)}) == (
+        60 * 300 * 6 * 300 * 8
+    )
+    admission = tools.ChartRenderer(
+        workers=2, queue_size=1, start_method="spawn", memory_budget=100
+    )
+
+    async def scenario():
+        await admission.admit(60)
+        # over the budget, waits
+        waiting = asyncio.create_task(admission.admit(60))
+        await asyncio.sleep(0)
+        assert not waiting.done()
+        with pytest.raises(tools.RenderRejected):
+            await admission.admit(10)
+
+        admission.release(60)
+        await waiting
+        assert (admission.running, admission.reserved) == (1, 60)
+
+        # cancelled render leaves the queue
+        cancelled = asyncio.create_task(admission.admit(60))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert not admission.waiters
+
+        # cancelled render already dropped by the release leaves quietly
+        cancelled = asyncio.create_task(admission.admit(60))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        admission.release(60)
+        admission.acquire(60)
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert not admission.waiters
+
+        # render larger than the budget starts alone
+        admission.release(60)
+        await admission.admit(1_000)
+        assert admission.running == 1
+        admission.release(1_000)
+        assert (admission.running, admission.reserved) == (0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_render_overload(monkeypatch):
+    """
+    Overloaded renderer responds with a fast 503 and Retry-After,
+    or with no chart if charts are skipped.
+    """
+    async def admit(size: int) -> None:
+        raise tools.RenderRejected(retry_after=7)
+
+    monkeypatch.setattr(renderer, "admit", admit)
+    deposit = {"date": "31.01.2021", "periods": 7, "amount": 10_777, "rate": 7}
+
+    response = client.post(url="/standard", json=deposit)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "7"
+    assert response.json() == {
+        "errors": {"chart": "Charts renderer is overloaded, retry later"}
+    }
+
+    monkeypatch.setattr(main, "RENDER_OVERLOAD", "skip")
+    response = client.post(url="/standard", json=deposit)
+    assert response.status_code == STATUS_OK
+    assert response.json()["chart"] is None
+    assert len(response.json()["data"]) == 7
+
+    # misspelled mode fails at startup instead of responding with 503s
+    result = subprocess.run(
+        [sys.executable, "-c", "import app.settings"],
+        capture_output=True, text=True,
+        env={**os.environ, "RENDER_OVERLOAD": "skipp"},
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    assert result.returncode != 0
+    assert "Value not in list: 'skipp'" in result.stderr
+
+
+def test_render_batch(monkeypatch):
+    """
+    Batch larger than the renderer's queue takes turns instead of being
+    rejected, a rejected chart cancels the rest of the batch.
+    """
+    def render_chart(schedule: dict, plotter_class) -> tuple[bytes, float]:
+        time.sleep(0.01)
+        return b"chart", 0.01
+
+    pool = tools.ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(tools, "timed_render_chart", render_chart)
+    monkeypatch.setattr(renderer, "pool", pool)
+    monkeypatch.setattr(renderer, "start", lambda: None)
+    monkeypatch.setattr(renderer, "workers", 2)
+    monkeypatch.setattr(renderer, "queue_size", 1)
+    deposits = [
+        {"date": "31.01.2021", "periods": 3, "amount": amount, "rate": 5}
+        for amount in range(12_301, 12_311)
+    ]
+
+    response = client.post(url="/standard/batch", json=deposits)
+    assert response.status_code == STATUS_OK
+    assert len({item["chart"] for item in response.json()}) == len(deposits)
+    assert (renderer.running, renderer.reserved) == (0, 0)
+
+    # the first render is rejected, the others would wait forever
+    admits, cancelled = [], []
+
+    async def admit(size: int) -> None:
+        admits.append(size)
+        if len(admits) == 1:
+            raise tools.RenderRejected()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(size)
+            raise
+
+    monkeypatch.setattr(renderer, "admit", admit)
+    deposits = [{**deposit, "rate": 6} for deposit in deposits]
+    response = client.post(url="/standard/batch", json=deposits)
+    assert response.status_code == 503
+    assert len(cancelled) == len(admits) - 1
+    assert len(admits) <= renderer.workers + 1
+    pool.shutdown()
+
+
+def test_chart_template():
+    """
+    Pre-built chart template is reused and safe to render from threads.
+    """
+    schedules = [
+        {"31.01.2021": 10050.0, "28.02.2021": 10100.25},
+        {"31.01.2021": 3020000.0, "28.02.2021": 3040133.33}
+    ]
+    template = plotting.chart_template(2)
+    assert plotting.chart_template(2) is template
+
+    expected = [template.render(schedule) for schedule in schedules]
+    with tools.ThreadPoolExecutor(max_workers=4) as pool:
+        bodies = list(pool.map(template.render, schedules * 4))
+    assert bodies == expected * 4
+    assert expected[0] != expected[1]
+
+
+def test_chart_uploader(monkeypatch):
+    """
+    Concurrent uploads overlap instead of serializing.
+    """
+    latency = 0.2
+
+    def save(*args) -> None:
+        time.sleep(latency)
+
+    monkeypatch.setattr(tools.storage, "save", save)
+    monkeypatch.setattr(tools.storage, "url", lambda key: key)
+
+    async def upload_concurrently(uploads: int) -> list[str]:
+        return await asyncio.gather(*(
+            Plotter({"01.01.1900": amount}, body=b"").upload_chart_async()
+            for amount in range(uploads)
+        ))
+
+    uploads = 8
+    start = time.perf_counter()
+    urls = asyncio.run(upload_concurrently(uploads))
+    assert time.perf_counter() - start < uploads * latency / 2
+    assert len(set(urls)) == uploads
+
+
+def test_chart_deduplication(monkeypatch):
+    """
+    Identical charts are plotted and stored once.
+    """
+    renders = []
+
+    async def render(
+        schedule: dict[str, float], plotter_class=Plotter
+    ) -> bytes:
+        renders.append(schedule)
+        return tools.render_chart(schedule, plotter_class)
+
+    monkeypatch.setattr(renderer, "render", render)
+    schedule = {"31.01.2021": 10050.0, "28.02.2021": 10100.25}
+    key = tools.chart_key(schedule)
+
+    for _ in range(2):
+        url = asyncio.run(Plotter.chart_url(schedule))
+        assert url is None or key in url
+    assert len(renders) <= 1
+    assert tools.storage.exists(key)
+
+
+class FakeS3Client:
+    """S3 client stand-in keeping objects in a dictionary. """
+
+    def __init__(self) -> None:
+        self.objects: dict[str, bytes] = {}
+        self.heads = 0
+
+    def put_object(self, *, Bucket, Key, Body, ContentType) -> None:
+        self.objects[Key] = Body.read()
+
+    def head_bucket(self, *, Bucket) -> None:
+        self.heads += 1
+
+    def head_object(self, *, Bucket, Key) -> None:
+        self.heads += 1
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+
+    def generate_presigned_url(self, *, ClientMethod, Params, ExpiresIn):
+        return f"https://s3.test/{Params["Bucket"]}/{Params["Key"]}"
+
+
+def test_chart_storages(monkeypatch, tmp_path):
+    """
+    Charts storages keep charts, S3 storage is backed by the local index.
+    """
+    monkeypatch.setattr(tools, "chart_index", tools.TTLCache(maxsize=8, ttl=60))
+    body = tools.render_svg({"31.01.2021": 10050.0})
+    key = tools.chart_key({"31.01.2021": 10050.0}, tools.ChartFormat.SVG)
+
+    s3_client = FakeS3Client()
+    storages = (
+        tools.S3ChartStorage(s3_client, "charts"),
+        tools.LocalChartStorage(str(tmp_path)),
+        tools.MemoryChartStorage(maxsize=8, ttl=60)
+    )
+    for storage in storages:
+        assert not storage.exists(key)
+        assert storage.response(key) is None
+        storage.save(key, io.BytesIO(body), "image/svg+xml")
+        assert storage.exists(key)
+        assert storage.response(key).status_code in (200, 307)
+
+    # recently uploaded chart isn't looked up in the bucket
+    heads = s3_client.heads
+    assert storages[0].exists(key)
+    assert s3_client.heads == heads
+    assert storages[0].url(key) == f"https://s3.test/charts/{key}"
+    assert tools.chart_index.stats()["hits"] >= 1
+
+    # local chart is served by the app straight from the file
+    assert (tmp_path / key).read_bytes() == body
+    assert not storages[1].exists("../" + key)
+    monkeypatch.setattr(tools, "storage", storages[1])
+    monkeypatch.setattr(main, "storage", storages[1])
+    response = client.get(f"/charts/{key}")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "image/svg+xml"
+    assert response.content == body
+
+    # keys other than charts' ones never reach the storage, e.g. S3 bucket
+    heads = s3_client.heads
+    monkeypatch.setattr(main, "storage", storages[0])
+    for other_key in ("secrets.txt", f"{key}.bak", key.upper()):
+        assert client.get(f"/charts/{other_key}").status_code == 404
+    assert s3_client.heads == heads
+
+    with pytest.raises(ValueError):
+        tools.make_storage("ftp")
+
+
+def test_lazy_charts(monkeypatch):
+    """
+    Lazy charts mode: chart links to the app and is rendered on download.
+    """
+    monkeypatch.setattr(main, "LAZY_CHARTS", True)
+    response = client.post(
+        url="/special",
+        json={
+            "date"   : "31.01.2021",
+            "periods": 2,
+            "amount" : 10_000,
+            "rate"   : 6
+        }
+    )
+    assert response.status_code == STATUS_OK
+
+    chart_url = response.json()["chart"]
+    assert chart_url.startswith(str(client.base_url) + "/charts/")
+
+    for _ in range(2):  # rendered, then kept
+        chart_response = client.get(chart_url)
+        assert chart_response.status_code == 200
+        assert chart_response.headers["Content-Type"] == "image/png"
+
+    assert client.get("/charts/unknown.png").status_code == 404
+
+
+def test_chart_formats():
+    """
+    SVG chart is rendered with no matplotlib, `none` skips the chart.
+    """
+    deposit = {
+        "date"   : "31.01.2021",
+        "periods": 12,
+        "amount" : 10_000,
+        "rate"   : 6
+    }
+    response = client.post(
+        url="/standard", params={"chart_format": "svg"}, json=deposit
+    )
+    assert response.status_code == STATUS_OK
+
+    chart_response = get_chart(response.json()["chart"])
+    assert chart_response.status_code == 200
+    assert chart_response.headers["Content-Type"] == "image/svg+xml"
+
+    # bars are drawn over the background
+    svg = ET.fromstring(chart_response.content)
+    rects = svg.findall("{http://www.w3.org/2000/svg}rect")
+    assert len(rects) == 1 + deposit["periods"]
+
+    response = client.post(
+        url="/standard", params={"chart_format": "none"}, json=deposit
+    )
+    assert response.json()["chart"] is None
+
+
+def scrape_metrics() -> dict[tuple, float]:
+    """Samples of the app's metrics by name and labels. """
+    response = client.get("/metrics")
+    assert response.status_code == STATUS_OK
+    return {
+        (sample.name, *sorted(sample.labels.items())): sample.value
+        for family in text_string_to_metric_families(response.text)
+        for sample in family.samples
+        if sample.name.startswith("compound_interest_")
+    }
+
+
+def test_metrics(monkeypatch):
+    """
+    Metrics of the request processing stages are labeled by endpoint.
+    """
+    def count(endpoint: str, stage: str) -> float:
+        return samples.get((
+            "compound_interest_stage_duration_seconds_count",
+            ("endpoint", endpoint),
+            ("stage", stage)
+        ), 0)
+
+    samples = scrape_metrics()
+    before = {
+        stage: count("/special", stage)
+        for stage in ("validation", "calculation", "plot")
+    }
+    failures = samples.get((
+        "compound_interest_validation_failures_total",
+        ("endpoint", "/standard")
+    ), 0)
+
+    deposit = {"date": "31.01.2021", "periods": 3, "amount": 10_321, "rate": 6}
+    assert client.post(url="/special", json=deposit).status_code == STATUS_OK
+    response = client.post(url="/standard", json={**deposit, "rate": 0})
+    assert response.status_code == STATUS_NOK
+
+    # S3 requests are observed in the uploader's threads
+    monkeypatch.setattr(
+        tools, "storage", tools.S3ChartStorage(FakeS3Client(), "charts")
+    )
+    token = metrics.endpoint.set("/special")
+    try:
+        plotter = Plotter({"31.01.2021": 10_321.0}, body=b"")
+        asyncio.run(plotter.upload_chart_async())
+    finally:
+        metrics.endpoint.reset(token)
+
+    samples = scrape_metrics()
+    for stage, observed in before.items():
+        assert count("/special", stage) == observed + 1
+    for stage in ("put_object", "generate_presigned_url"):
+        assert count("/special", stage) >= 1
+    assert samples[(
+        "compound_interest_validation_failures_total",
+        ("endpoint", "/standard")
+    )] == failures + 1
+    assert samples[("compound_interest_renders_in_flight",)] == 0
+
+
+def test_profiling(monkeypatch, tmp_path):
+    """
+    Flagged request is profiled and its profile is named by request id.
+    """
+    deposit = {"date": "31.01.2021", "periods": 60, "amount": 3_000_000, "rate": 8}
+    monkeypatch.setattr(profiling, "PROFILING_DIR", str(tmp_path))
+
+    # profiling is off
+    response = client.post(url="/special", params={"profile": 1}, json=deposit)
+    assert "x-request-id" not in response.headers
+    assert not list(tmp_path.iterdir())
+
+    monkeypatch.setattr(profiling, "PROFILING", True)
+    response = client.post(url="/special", json=deposit)
+    assert "x-request-id" not in response.headers
+
+    response = client.post(
+        url="/special",
+        params={"chart_format": "none"},
+        headers={"X-Profile": "1", "X-Request-ID": "slow-special"},
+        json=deposit
+    )
+    assert response.status_code == STATUS_OK
+    assert response.headers["x-request-id"] == "slow-special"
+    stats = pstats.Stats(str(tmp_path / "slow-special.prof"))
+    assert any(
+        function == "special_interest_scenario"
+        for _, _, function in stats.stats
+    )
+
+    # unsafe request id is replaced
+    response = client.post(
+        url="/special",
+        params={"profile": "true"},
+        headers={"X-Request-ID": "../escape"},
+        json=deposit
+    )
+    profile_id = response.headers["x-request-id"]
+    assert profile_id != "../escape"
+    assert (tmp_path / f"{profile_id}.prof").is_file()
+
+
+def test_warm_up(monkeypatch):
+    """
+    App is ready only once the warm-up built OpenAPI schema, plotted
+    a throwaway chart and connected to the charts storage.
+    """
+    s3_client = FakeS3Client()
+    monkeypatch.setattr(main, "storage", tools.S3ChartStorage(s3_client, "charts"))
+    monkeypatch.setattr(app, "openapi_schema", None)
+
+    # lifespan isn't run by the module's client
+    response = client.get("/ready")
+    assert response.status_code == 503
+
+    with TestClient(app) as warming_client:
+        deadline = time.monotonic() + 60
+        while warming_client.get("/ready").status_code != STATUS_OK:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        assert app.openapi_schema is not None
+        assert s3_client.heads == 1
+        assert all(spawn.done() for spawn in tools.renderer.spawns)
+
+
+# seconds to import the app on top of its framework's packages, a generous
+# bound catching heavy imports only, raise it for slow CI runners
+IMPORT_TIME_BUDGET: float = config("IMPORT_TIME_BUDGET", default=2, cast=float)
+
+
+def test_import_time():
+    """
+    App imports fast, with neither matplotlib nor boto3,
+    and needs no S3 settings until the first chart.
+    """
+    script = """
+import json, sys, time
+import fastapi, numpy, prometheus_client, pydantic
+start = time.perf_counter()
+import app.main
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "modules": sorted(
+        name for name in ("boto3", "botocore", "matplotlib", "mplcyberpunk")
+        if name in sys.modules
+    )
+}))
+"""
+    env = {
+        name: value for name, value in os.environ.items()
+        if not name.startswith("S3_")
+    }
+    env["CHART_STORAGE"] = "s3"
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True, text=True, check=True, env=env,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    report = json.loads(result.stdout)
+    assert report["modules"] == []
+    assert report["seconds"] < IMPORT_TIME_BUDGET
+
+
 def test_redirect_to_docs():
     """Test redirect from root to FastAPI Swagger docs. """
     response = client.get("/")
@@ -1,39 +1,46 @@
+import asyncio
+import contextvars
+import hashlib
 import io
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
 import warnings
-import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from collections.abc import Callable, Hashable, Iterator
+from contextlib import contextmanager, nullcontext, suppress
+from concurrent.futures import (
+    Future, ProcessPoolExecutor, ThreadPoolExecutor
+)
+from concurrent.futures.process import BrokenProcessPool
+from enum import StrEnum
+from string import Template
+from typing import Any, BinaryIO, Self
 
-import boto3
-import matplotlib.pyplot as plt
-import mplcyberpunk
 from decouple import config
+from starlette.responses import FileResponse, RedirectResponse, Response
 
+from . import metrics
 from .settings import (
-    MPL_RUNTIME_CONFIG,
+    CHART_INDEX_SIZE, CHART_INDEX_TTL,
+    CHART_MEMORY_SIZE, CHART_STORAGE, CHART_STORAGE_DIR,
+    LAZY_CHARTS_SIZE,
+    MPL_RUNTIME_CONFIG, MPL_STYLE,
+    RENDER_BYTES_PER_PIXEL, RENDER_MEMORY_BUDGET, RENDER_RETRY_AFTER,
+    RENDER_QUEUE_SIZE, RENDER_START_METHOD, RENDER_WORKERS,
+    S3_CONNECT_TIMEOUT, S3_READ_TIMEOUT, S3_MAX_ATTEMPTS,
+    S3_UPLOAD_QUEUE_SIZE, S3_UPLOAD_WORKERS,
     S3_URL_LIFESPAN,
     # formatwarning
 )
 
-# select Anti-Grain Geometry backend to prevent "UserWarning:
-# Starting a Matplotlib GUI outside of the main thread will likely fail."
-# https://matplotlib.org/stable/users/explain/figure/backends.html#backends
-plt.rcParams.update(MPL_RUNTIME_CONFIG)
-plt.style.use("cyberpunk")
-plt.switch_backend("agg")
-
-
-bucket_name = config("S3_BUCKET_NAME")
-tenant_id   = config("S3_TENANT_ID")
-key_id      = config("S3_KEY_ID")
-
-session = boto3.session.Session(
-    aws_access_key_id=f"{tenant_id}:{key_id}",
-    aws_secret_access_key=config("S3_KEY_SECRET"),
-    region_name=config("S3_REGION_NAME")
-)
-client = session.client(
-    service_name="s3",
-    endpoint_url=config("S3_ENDPOINT_URL")
-)
+# matplotlib and boto3 are slow to import, they're imported on first use:
+# PNG chart templates in `plotting` module, S3 client by `S3ChartStorage`,
+# so the app starts fast and calculations don't pay for charts
 
 numeric = int | float
 # warnings.formatwarning = formatwarning
@@ -49,57 +56,933 @@ def clamp(
     return clamped_value
 
 
+class ChartFormat(StrEnum):
+    """
+    Format of the deposit balance progress chart, `none` means no chart.
+    """
+    PNG  = "png"
+    SVG  = "svg"
+    NONE = "none"
+
+    @property
+    def media_type(self) -> str:
+        return {"png": "image/png", "svg": "image/svg+xml"}[self]
+
+
+# SVG chart mimics matplotlib chart of the same size in inches
+# and colors of the cyberpunk style: "C3", axes background, text "0.9"
+SVG_DPI: int = 100
+SVG_BAR_COLOR = "#00ff41"
+SVG_BACKGROUND = "#212946"
+SVG_TEXT_COLOR = "#e6e6e6"
+SVG_CHART = Template("""\
+<svg xmlns="http://www.w3.org/2000/svg" width="$width" height="$height" \
+viewBox="0 0 $width $height" font-family="Arial, Liberation Sans, DejaVu Sans, sans-serif">
+<defs><linearGradient id="bar" x1="0" y1="1" x2="0" y2="0">\
+<stop offset="0" stop-color="$color" stop-opacity="0"/>\
+<stop offset="1" stop-color="$color"/></linearGradient></defs>
+<rect width="$width" height="$height" fill="$background"/>
+<text x="$center" y="$title_y" font-size="$title_size" fill="$text_color" \
+text-anchor="middle">Deposit balance progress</text>
+$bars
+</svg>
+""")
+SVG_BAR = Template("""\
+<rect x="$x" y="$y" width="$bar_width" height="$bar_height" fill="url(#bar)"/>\
+<text x="$center" y="$label_y" font-size="$label_size" fill="$text_color" \
+text-anchor="middle">$amount</text>\
+<text transform="translate($tick_x $tick_y) rotate(-90)" \
+font-size="$tick_size" fill="$text_color">$date</text>""")
+
+
+def render_svg(schedule: dict[str, float]) -> bytes:
+    """
+    Render SVG chart for provided interest schedule straight from
+    the templates, with no matplotlib involved.
+    """
+    data_size = len(schedule)
+    points = SVG_DPI / 72  # pixels per typographic point
+    title_size = clamp(data_size * 3, low=15, high=72, warn=False) * points
+    label_size = (9 if next(iter(schedule.values())) < 100_000 else 8) * points
+    tick_size = 10 * points
+
+    # title above the plot area of figsize=(data_size, 6) inches
+    width, plot_height = data_size * SVG_DPI, 6 * SVG_DPI
+    plot_top = title_size + MPL_RUNTIME_CONFIG["axes.titlepad"] * points
+    height = plot_top + plot_height
+    highest = max(schedule.values()) * 1.05  # leave room for labels
+
+    bars = []
+    for index, (date, amount) in enumerate(schedule.items()):
+        bar_height = amount / highest * (plot_height - label_size)
+        y = height - bar_height
+        center = (index + 0.5) * SVG_DPI
+        bars.append(SVG_BAR.substitute(
+            x=f"{center - 0.4 * SVG_DPI:.1f}",
+            y=f"{y:.1f}",
+            bar_width=f"{0.8 * SVG_DPI:.1f}",
+            bar_height=f"{bar_height:.1f}",
+            center=f"{center:.1f}",
+            label_y=f"{y - label_size / 2:.1f}",
+            label_size=f"{label_size:.1f}",
+            amount=f"{amount:.2f}",
+            # date ticks are inside the bars, like tick_params(pad=-55)
+            tick_x=f"{center + tick_size / 3:.1f}",
+            tick_y=f"{height - 10 * points:.1f}",
+            tick_size=f"{tick_size:.1f}",
+            date=date,
+            text_color=SVG_TEXT_COLOR
+        ))
+
+    return SVG_CHART.substitute(
+        width=width,
+        height=f"{height:.0f}",
+        center=width / 2,
+        title_y=f"{title_size:.1f}",
+        title_size=f"{title_size:.1f}",
+        color=SVG_BAR_COLOR,
+        background=SVG_BACKGROUND,
+        text_color=SVG_TEXT_COLOR,
+        bars="\n".join(bars)
+    ).encode()
+
+
+# SVG heatmap of the sensitivity grid, cells shade from the background
+# to the bar color, sizes are pixels; narrow heatmaps are widened to fit
+# the title
+SVG_CELL_WIDTH: int = 60
+SVG_CELL_HEIGHT: int = 30
+SVG_HEATMAP_MARGIN: int = 60
+SVG_HEATMAP_MIN_WIDTH: int = 360
+SVG_HEATMAP = Template("""\
+<svg xmlns="http://www.w3.org/2000/svg" width="$width" height="$height" \
+viewBox="0 0 $width $height" font-family="Arial, Liberation Sans, DejaVu Sans, sans-serif">
+<rect width="$width" height="$height" fill="$background"/>
+<text x="$center" y="$title_y" font-size="20" fill="$text_color" \
+text-anchor="middle">Final balance by rate and term</text>
+<text x="$center" y="$xlabel_y" font-size="14" fill="$text_color" \
+text-anchor="middle">Term, months</text>
+<text transform="translate($ylabel_x $ylabel_y) rotate(-90)" font-size="14" \
+fill="$text_color" text-anchor="middle">Annual rate, %</text>
+$cells
+</svg>
+""")
+SVG_CELL = Template("""\
+<rect x="$x" y="$y" width="$cell_width" height="$cell_height" fill="$fill"/>\
+<text x="$center_x" y="$center_y" font-size="10" fill="$label_color" \
+text-anchor="middle" dominant-baseline="middle">$balance</text>""")
+SVG_TICK = Template("""\
+<text x="$x" y="$y" font-size="12" fill="$text_color" \
+text-anchor="$anchor" dominant-baseline="middle">$label</text>""")
+
+
+def mix_colors(low: str, high: str, share: float) -> str:
+    """Color `share` of the way from `low` to `high`, #rrggbb both. """
+    channels = (
+        round(int(low[i:i + 2], 16) * (1 - share)
+              + int(high[i:i + 2], 16) * share)
+        for i in (1, 3, 5)
+    )
+    return "#" + "".join(f"{channel:02x}" for channel in channels)
+
+
+def render_heatmap_svg(grid: dict[str, list]) -> bytes:
+    """
+    Render SVG heatmap of the final balances for provided sensitivity grid
+    straight from the templates: rates are rows from the lowest up,
+    terms are columns.
+    """
+    rates, periods, balances = grid["rates"], grid["periods"], grid["data"]
+    margin = SVG_HEATMAP_MARGIN
+    width = max(
+        2 * margin + len(periods) * SVG_CELL_WIDTH, SVG_HEATMAP_MIN_WIDTH
+    )
+    height = 2 * margin + len(rates) * SVG_CELL_HEIGHT
+    low = min(map(min, balances))
+    high = max(map(max, balances))
+
+    elements = []
+    for row, (rate, row_balances) in enumerate(zip(rates, balances)):
+        y = margin + (len(rates) - 1 - row) * SVG_CELL_HEIGHT
+        elements.append(SVG_TICK.substitute(
+            x=margin - 5, y=y + SVG_CELL_HEIGHT / 2, anchor="end",
+            label=f"{rate:g}", text_color=SVG_TEXT_COLOR
+        ))
+        for column, balance in enumerate(row_balances):
+            share = (balance - low) / (high - low) if high > low else 0.0
+            x = margin + column * SVG_CELL_WIDTH
+            elements.append(SVG_CELL.substitute(
+                x=x,
+                y=y,
+                cell_width=SVG_CELL_WIDTH,
+                cell_height=SVG_CELL_HEIGHT,
+                fill=mix_colors(SVG_BACKGROUND, SVG_BAR_COLOR, share),
+                center_x=x + SVG_CELL_WIDTH / 2,
+                center_y=y + SVG_CELL_HEIGHT / 2,
+                # dark labels over the bright cells
+                label_color=SVG_BACKGROUND if share > 0.5 else SVG_TEXT_COLOR,
+                balance=f"{balance:.0f}"
+            ))
+    for column, term in enumerate(periods):
+        elements.append(SVG_TICK.substitute(
+            x=margin + (column + 0.5) * SVG_CELL_WIDTH,
+            y=height - margin + 12, anchor="middle",
+            label=term, text_color=SVG_TEXT_COLOR
+        ))
+
+    return SVG_HEATMAP.substitute(
+        width=width,
+        height=height,
+        center=width / 2,
+        title_y=margin / 2,
+        xlabel_y=height - margin / 3,
+        ylabel_x=margin / 3,
+        ylabel_y=height / 2,
+        background=SVG_BACKGROUND,
+        text_color=SVG_TEXT_COLOR,
+        cells="\n".join(elements)
+    ).encode()
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with limited lifespan of entries
+    and hit/miss/eviction counters.
+    """
+
+    def __init__(self, *, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl  # seconds
+        # key -> (expiration time, value), least recently used first
+        self.entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return value of the live entry, `default` otherwise. """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.entries.pop(key, None)
+                self.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Add or renew entry, evicting the least recently used one. """
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all entries, counters are kept. """
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        """Counters, current size and hit rate of the cache. """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits"     : self.hits,
+                "misses"   : self.misses,
+                "evictions": self.evictions,
+                "size"     : len(self.entries),
+                "maxsize"  : self.maxsize,
+                "hit_rate" : self.hits / lookups if lookups else 0.0
+            }
+
+
+# local index of charts recently uploaded to S3, chart key -> True
+chart_index = TTLCache(maxsize=CHART_INDEX_SIZE, ttl=CHART_INDEX_TTL)
+
+
+# charts of the lazy mode, chart key -> (plotter class, schedule, chart
+# format) until the chart is rendered on the first download, its plotter
+# afterwards
+lazy_charts = TTLCache(maxsize=LAZY_CHARTS_SIZE, ttl=S3_URL_LIFESPAN)
+
+
+def chart_key(
+    schedule: dict[str, float], chart_format: ChartFormat = ChartFormat.PNG
+) -> str:
+    """
+    Content address of the schedule's chart:
+    hash of the schedule and render settings.
+    """
+    content = json.dumps(
+        [schedule, MPL_RUNTIME_CONFIG, MPL_STYLE, chart_format]
+    )
+    return f"{hashlib.sha256(content.encode()).hexdigest()}.{chart_format}"
+
+
+# content address of the chart, see `chart_key`
+CHART_KEY_PATTERN = re.compile(
+    rf"[0-9a-f]{{64}}\.(?:{ChartFormat.PNG}|{ChartFormat.SVG})"
+)
+
+
+def chart_media_type(key: str) -> str:
+    """Media type of the chart by its key's extension. """
+    return ChartFormat(key.rsplit(".", 1)[-1]).media_type
+
+
+class ChartStorage(ABC):
+    """
+    Abstract base class of the rendered charts' storage.
+    Methods are blocking and are called in the uploader's threads.
+    """
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Check if the chart is stored. """
+        raise NotImplementedError
+
+    @abstractmethod
+    def save(self, key: str, body: BinaryIO, media_type: str) -> None:
+        """Store the chart. """
+        raise NotImplementedError
+
+    @abstractmethod
+    def url(self, key: str) -> str | None:
+        """
+        Download link of the stored chart,
+        `None` if the chart is served by the app's /charts/{key} route.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def response(self, key: str) -> Response | None:
+        """
+        Response of the app's /charts/{key} route,
+        `None` if the chart isn't stored.
+        """
+        raise NotImplementedError
+
+    def warm_up(self) -> None:
+        """Prepare storage for the first chart, nothing to do by default. """
+
+
+class S3ChartStorage(ChartStorage):
+    """
+    Charts in S3 bucket, downloaded by limited time presigned links.
+    Recently uploaded charts are tracked in the local index,
+    so they aren't looked up in the bucket.
+    Client and bucket default to S3_* environment variables and are set up
+    on first use, so S3 settings aren't required until the first chart.
+    """
+
+    def __init__(
+        self, client: Any | None = None, bucket_name: str | None = None
+    ) -> None:
+        self._client = client
+        self._bucket_name = bucket_name
+        self.lock = threading.Lock()
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            with self.lock:
+                if self._client is None:
+                    self._client = self.make_client()
+        return self._client
+
+    @property
+    def bucket_name(self) -> str:
+        if self._bucket_name is None:
+            self._bucket_name = config("S3_BUCKET_NAME")
+        return self._bucket_name
+
+    @staticmethod
+    def make_client() -> Any:
+        """S3 client configured by S3_* environment variables. """
+        import boto3
+        from botocore.config import Config
+
+        session = boto3.session.Session(
+            aws_access_key_id=(
+                f"{config("S3_TENANT_ID")}:{config("S3_KEY_ID")}"
+            ),
+            aws_secret_access_key=config("S3_KEY_SECRET"),
+            region_name=config("S3_REGION_NAME")
+        )
+        # client is thread-safe and shared by uploader's threads,
+        # so its connection pool is sized to the number of threads
+        client = session.client(
+            service_name="s3",
+            endpoint_url=config("S3_ENDPOINT_URL"),
+            config=Config(
+                max_pool_connections=S3_UPLOAD_WORKERS,
+                connect_timeout=S3_CONNECT_TIMEOUT,
+                read_timeout=S3_READ_TIMEOUT,
+                retries={"max_attempts": S3_MAX_ATTEMPTS, "mode": "standard"}
+            )
+        )
+        return client
+
+    def warm_up(self) -> None:
+        """Create client and open its first connection to the bucket. """
+        self.client.head_bucket(Bucket=self.bucket_name)
+
+    def exists(self, key: str) -> bool:
+        """
+        Check if the chart was recently uploaded according to the local
+        index, or if it's in the bucket.
+        """
+        from botocore.exceptions import ClientError
+
+        if chart_index.get(key):
+            return True
+        try:
+            self.client.head_object(Bucket=self.bucket_name, Key=key)
+        except ClientError as error:
+            if error.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                return False
+            raise
+        chart_index.set(key, True)
+        return True
+
+    def save(self, key: str, body: BinaryIO, media_type: str) -> None:
+        params = {
+            "Bucket"     : self.bucket_name,
+            "Key"        : key,
+            "Body"       : body,
+            "ContentType": media_type
+        }
+        with metrics.stage("put_object"):
+            self.client.put_object(**params)
+        chart_index.set(key, True)
+
+    def url(self, key: str) -> str:
+        """Limited time download link of the chart. """
+        with metrics.stage("generate_presigned_url"):
+            return self.client.generate_presigned_url(
+                ClientMethod="get_object",
+                Params={
+                    "Bucket": self.bucket_name,
+                    "Key"   : key
+                },
+                ExpiresIn=S3_URL_LIFESPAN
+            )
+
+    def response(self, key: str) -> Response | None:
+        """Redirect to the chart's download link. """
+        return RedirectResponse(self.url(key)) if self.exists(key) else None
+
+
+class LocalChartStorage(ChartStorage):
+    """
+    Charts in the local directory, served by the app with `FileResponse`,
+    i.e. straight from the file with no copy in the app's memory.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: str) -> str | None:
+        """Path to the chart's file, `None` if the key isn't chart's one. """
+        # key comes from the route, never let it escape the directory
+        if CHART_KEY_PATTERN.fullmatch(key) is None:
+            return None
+        return os.path.join(self.directory, key)
+
+    def exists(self, key: str) -> bool:
+        path = self.path(key)
+        return path is not None and os.path.isfile(path)
+
+    def save(self, key: str, body: BinaryIO, media_type: str) -> None:
+        # readers never see a partially written file
+        path = self.path(key)
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(body.read())
+        os.replace(temporary, path)
+
+    def url(self, key: str) -> None:
+        return None
+
+    def response(self, key: str) -> Response | None:
+        if not self.exists(key):
+            return None
+        return FileResponse(self.path(key), media_type=chart_media_type(key))
+
+
+class MemoryChartStorage(ChartStorage):
+    """
+    Charts in the app process' memory, e.g. for tests and single instance
+    deployments. The least recently used charts are evicted.
+    """
+
+    def __init__(self, *, maxsize: int, ttl: float) -> None:
+        self.charts = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def exists(self, key: str) -> bool:
+        return self.charts.get(key) is not None
+
+    def save(self, key: str, body: BinaryIO, media_type: str) -> None:
+        self.charts.set(key, body.read())
+
+    def url(self, key: str) -> None:
+        return None
+
+    def response(self, key: str) -> Response | None:
+        content = self.charts.get(key)
+        if content is None:
+            return None
+        return Response(content=content, media_type=chart_media_type(key))
+
+
+# storages by the CHART_STORAGE setting
+CHART_STORAGES: dict[str, Callable[[], ChartStorage]] = {
+    "s3"    : S3ChartStorage,
+    "local" : lambda: LocalChartStorage(CHART_STORAGE_DIR),
+    "memory": lambda: MemoryChartStorage(
+        maxsize=CHART_MEMORY_SIZE, ttl=CHART_INDEX_TTL
+    )
+}
+
+
+def make_storage(backend: str) -> ChartStorage:
+    """Storage of the rendered charts selected by its name. """
+    if backend not in CHART_STORAGES:
+        raise ValueError(
+            f"Unknown chart storage {backend!r}, "
+            f"expected one of {", ".join(CHART_STORAGES)}"
+        )
+    return CHART_STORAGES[backend]()
+
+
+storage = make_storage(CHART_STORAGE)
+
+
+def chart_figsize(data_size: int) -> tuple[float, float]:
+    """Size of the PNG chart with `data_size` bars, inches. """
+    # stretch chart depending on data
+    return data_size, 6
+
+
+def heatmap_figsize(rows: int, columns: int) -> tuple[float, float]:
+    """Size of the PNG heatmap with `rows` by `columns` cells, inches. """
+    return (
+        clamp(columns * 0.8 + 3, low=6, high=51, warn=False),
+        clamp(rows * 0.4 + 2, low=4, high=26, warn=False)
+    )
+
+
 class Plotter:
     """
     Helper class to plot deposit balance progress chart and upload it to S3.
     """
 
-    def __init__(self, schedule: dict[str, float]) -> None:
+    def __init__(
+        self,
+        schedule: dict[str, float],
+        body: bytes | None = None,
+        chart_format: ChartFormat = ChartFormat.PNG
+    ) -> None:
         self.schedule = schedule
+        self.chart_format = chart_format
+        self.key = chart_key(schedule, chart_format)
         self.body = io.BytesIO()
-        self._plot_chart()
+        # chart is plotted unless it's already rendered elsewhere
+        if body is None and chart_format == ChartFormat.SVG:
+            self._render_svg()
+        elif body is None:
+            self._plot_chart()
+        else:
+            self.body.write(body)
+            self.body.seek(0)
+
+    @classmethod
+    async def render(
+        cls,
+        schedule: dict[str, float],
+        chart_format: ChartFormat = ChartFormat.PNG
+    ) -> Self:
+        """
+        Plot chart off the event loop, in the renderer's pool.
+        Lightweight SVG chart is rendered in-place.
+        """
+        if chart_format == ChartFormat.SVG:
+            with metrics.stage("plot"):
+                return cls(schedule, chart_format=chart_format)
+        return cls(schedule, body=await renderer.render(schedule, cls))
+
+    @classmethod
+    async def chart_url(
+        cls,
+        schedule: dict[str, float],
+        chart_format: ChartFormat = ChartFormat.PNG
+    ) -> str | None:
+        """
+        Return a download link of the schedule's chart, `None` if the chart
+        is served by the app's /charts/{key} route.
+        Identical charts share the key, so chart is plotted and stored
+        only if it's not there yet.
+        """
+        key = chart_key(schedule, chart_format)
+        if await uploader.run(storage.exists, key):
+            return storage.url(key)
+        plotter = await cls.render(schedule, chart_format)
+        return await plotter.upload_chart_async()
+
+    @classmethod
+    def defer(
+        cls,
+        schedule: dict[str, float],
+        chart_format: ChartFormat = ChartFormat.PNG
+    ) -> str:
+        """
+        Register the schedule's chart to be rendered on the first download
+        and return its key.
+        """
+        key = chart_key(schedule, chart_format)
+        # renew lifespan of the chart, keeping it if already rendered
+        state = lazy_charts.get(key)
+        lazy_charts.set(
+            key, (cls, schedule, chart_format) if state is None else state
+        )
+        return key
+
+    @classmethod
+    async def deferred_chart(cls, key: str) -> Self | None:
+        """
+        Return plotter of the registered chart, rendering it if needed,
+        or `None` if the chart is unknown or expired.
+        """
+        state = lazy_charts.get(key)
+        if isinstance(state, tuple):
+            plotter_class, schedule, chart_format = state
+            state = await plotter_class.render(schedule, chart_format)
+            lazy_charts.set(key, state)
+        return state
+
+    @staticmethod
+    def figure_size(schedule: dict[str, float]) -> tuple[float, float]:
+        """Size of the schedule's PNG chart, inches. """
+        return chart_figsize(len(schedule))
+
+    @classmethod
+    def raster_bytes(cls, schedule: dict[str, float]) -> int:
+        """Estimated memory of the PNG chart's raster while plotting. """
+        width, height = cls.figure_size(schedule)
+        dpi = MPL_RUNTIME_CONFIG["figure.dpi"]
+        return int(width * dpi * height * dpi * RENDER_BYTES_PER_PIXEL)
+
+    def _render_svg(self) -> None:
+        """Render SVG chart for provided interest schedule as bytes. """
+        self.body.write(render_svg(self.schedule))
+        self.body.seek(0)
 
     def _plot_chart(self) -> None:
         """Plot chart for provided interest schedule and save it as bytes. """
-        # stretch chart depending on data
-        data_size = len(self.schedule)
-        fig, ax = plt.subplots(figsize=(data_size, 6))
-
-        # plot bars and add amount labels
-        dates, amounts = map(list, (self.schedule, self.schedule.values()))
-        bars = plt.bar(dates, amounts, color="C3")
-        mplcyberpunk.add_bar_gradient(bars=bars)
-        label_size = 9 if amounts[0] < 100_000 else 8
-        ax.bar_label(ax.containers[0], fmt="%.2f", size=label_size)
-
-        # add xticks and title
-        plt.xticks(rotation=90, ha="center")
-        ax.tick_params(axis="x", pad=-55)
-        ax.set_axisbelow(True)
-        title_size = clamp(data_size * 3, low=15, high=72, warn=False)
-        plt.title("Deposit balance progress", size=title_size)
-
-        # save chart to bytes buffer
-        plt.savefig(self.body, bbox_inches="tight", format="png")
+        from .plotting import chart_template
+
+        template = chart_template(len(self.schedule))
+        self.body.write(template.render(self.schedule))
         self.body.seek(0)
-        plt.close(fig)
 
-    def upload_chart(self) -> str:
-        """Upload chart to S3 and return a limited time download link. """
-        filename = str(uuid.uuid4()) + ".png"
-        params = {
-            "Bucket"     : bucket_name,
-            "Key"        : filename,
-            "Body"       : self.body,
-            "ContentType": "image/png"
-        }
-        client.put_object(**params)
-        url = client.generate_presigned_url(
-            ClientMethod="get_object",
-            Params={
-                "Bucket": bucket_name,
-                "Key"   : filename
-            },
-            ExpiresIn=S3_URL_LIFESPAN
+    def upload_chart(self) -> str | None:
+        """
+        Store chart and return its download link, `None` if the chart
+        is served by the app's /charts/{key} route.
+        """
+        storage.save(self.key, self.body, self.chart_format.media_type)
+        return storage.url(self.key)
+
+    async def upload_chart_async(self) -> str | None:
+        """Upload chart in the uploader's thread pool, off the event loop. """
+        return await uploader.run(self.upload_chart)
+
+
+class HeatmapPlotter(Plotter):
+    """
+    Plotter of the sensitivity grid's heatmap. Its schedule is the grid
+    {"rates": [...], "periods": [...], "data": [[...],...]} of the final
+    balances by rate (rows) and term (columns).
+    """
+
+    @staticmethod
+    def figure_size(schedule: dict[str, list]) -> tuple[float, float]:
+        """Size of the grid's PNG heatmap, inches. """
+        return heatmap_figsize(
+            len(schedule["rates"]), len(schedule["periods"])
         )
-        return url
+
+    def _render_svg(self) -> None:
+        """Render SVG heatmap for provided grid as bytes. """
+        self.body.write(render_heatmap_svg(self.schedule))
+        self.body.seek(0)
+
+    def _plot_chart(self) -> None:
+        """Plot heatmap for provided grid and save it as bytes. """
+        from .plotting import render_heatmap
+
+        self.body.write(render_heatmap(self.schedule))
+        self.body.seek(0)
+
+
+def render_chart(
+    schedule: dict[str, float], plotter_class: type[Plotter] = Plotter
+) -> bytes:
+    """Plot chart for provided interest schedule and return its bytes. """
+    return plotter_class(schedule).body.getvalue()
+
+
+def timed_render_chart(
+    schedule: dict[str, float], plotter_class: type[Plotter] = Plotter
+) -> tuple[bytes, float]:
+    """
+    Plot chart for provided interest schedule and return its bytes
+    and plotting time, seconds, measured in the renderer's worker.
+    """
+    start = time.perf_counter()
+    body = render_chart(schedule, plotter_class)
+    return body, time.perf_counter() - start
+
+
+def warm_up_worker() -> None:
+    """
+    Initialize renderer's worker process: throwaway chart loads matplotlib,
+    cyberpunk style and fonts.
+    """
+    render_chart({"01.01.2021": 10_000.0})
+
+
+class RenderRejected(Exception):
+    """Render isn't admitted: renderer's queue is full. """
+
+    def __init__(self, retry_after: int = RENDER_RETRY_AFTER) -> None:
+        super().__init__("Charts renderer is overloaded, retry later")
+        self.retry_after = retry_after  # seconds
+
+
+# renders of the current batch request allowed to wait or run at once,
+# see `ChartRenderer.batch`
+batch_slots: contextvars.ContextVar[asyncio.Semaphore | None] = (
+    contextvars.ContextVar("batch_slots", default=None)
+)
+
+
+class ChartRenderer:
+    """
+    Pool of warm worker processes to plot charts off the event loop,
+    so the event loop keeps serving calculations while charts are plotted
+    on other cores.
+
+    Admission control keeps bursts from exhausting memory: a render
+    starts once there's a free worker and its raster fits the memory
+    budget along with the renders in progress, a render larger than
+    the budget only starts alone. Others wait in order in a bounded queue,
+    renders beyond the queue are rejected at once with `RenderRejected`.
+    Renders of a batch request are let in a few at a time, see `batch`.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int,
+        queue_size: int,
+        start_method: str,
+        memory_budget: int = RENDER_MEMORY_BUDGET
+    ) -> None:
+        self.workers = workers
+        self.queue_size = queue_size
+        self.start_method = start_method
+        self.memory_budget = memory_budget  # bytes
+        # renders in progress and their estimated raster bytes, renders
+        # waiting for admission with their bytes, first come first served
+        self.running = 0
+        self.reserved = 0
+        self.waiters: deque[tuple[int, asyncio.Future]] = deque()
+        self.pool: ProcessPoolExecutor | None = None
+        # tasks spawning workers, done once workers are warmed up
+        self.spawns: list[Future] = []
+
+    def fits(self, size: int) -> bool:
+        """Check if a render of `size` bytes can start right now. """
+        return self.running < max(self.workers, 1) and (
+            self.running == 0 or self.reserved + size <= self.memory_budget
+        )
+
+    def acquire(self, size: int) -> None:
+        """Account a render of `size` bytes as started. """
+        self.running += 1
+        self.reserved += size
+        metrics.RENDER_MEMORY_RESERVED.set(self.reserved)
+
+    def release(self, size: int) -> None:
+        """Account a render of `size` bytes as done, admit the waiting. """
+        self.running -= 1
+        self.reserved -= size
+        metrics.RENDER_MEMORY_RESERVED.set(self.reserved)
+        while self.waiters and self.fits(self.waiters[0][0]):
+            size, admission = self.waiters.popleft()
+            if not admission.done():  # unless its request is cancelled
+                self.acquire(size)
+                admission.set_result(None)
+
+    async def admit(self, size: int) -> None:
+        """
+        Wait for the render of `size` bytes to be admitted,
+        raise `RenderRejected` if the queue is full.
+        """
+        if not self.waiters and self.fits(size):
+            self.acquire(size)
+            return
+        if len(self.waiters) >= self.queue_size:
+            metrics.RENDERS_REJECTED.inc()
+            raise RenderRejected()
+
+        admission = asyncio.get_running_loop().create_future()
+        self.waiters.append((size, admission))
+        try:
+            await admission
+        except asyncio.CancelledError:
+            if admission.done() and not admission.cancelled():
+                self.release(size)  # admitted, but no longer needed
+            else:
+                # unless `release` has already dropped the cancelled render
+                with suppress(ValueError):
+                    self.waiters.remove((size, admission))
+            raise
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Let charts of the batch request, rendered concurrently within
+        the block, wait or run no more than the workers at once, so a large
+        batch takes turns instead of being rejected by its own renders.
+        """
+        token = batch_slots.set(asyncio.Semaphore(max(self.workers, 1)))
+        try:
+            yield
+        finally:
+            batch_slots.reset(token)
+
+    def start(self) -> None:
+        """Start the pool and warm up all of its workers. """
+        if self.pool is not None or not self.workers:
+            return
+
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=warm_up_worker
+        )
+        # workers are spawned on demand, so demand them all at once
+        self.spawns = [self.pool.submit(int) for _ in range(self.workers)]
+
+    async def warm_up(self) -> None:
+        """
+        Start the pool and wait for its workers to warm up, or warm up
+        the app's process if charts are plotted in-place.
+        """
+        if not self.workers:
+            await asyncio.to_thread(warm_up_worker)
+            return
+        self.start()
+        await asyncio.gather(*map(asyncio.wrap_future, self.spawns))
+
+    def shutdown(self) -> None:
+        """Stop the pool, it's restarted on the next render. """
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    async def render(
+        self,
+        schedule: dict[str, float],
+        plotter_class: type[Plotter] = Plotter
+    ) -> bytes:
+        """
+        Plot chart for provided interest schedule with the plotter class
+        in the pool once the render is admitted, see `admit` and `batch`.
+        Chart is plotted in-place if the pool has no workers.
+        """
+        size = plotter_class.raster_bytes(schedule)
+        slots = batch_slots.get()
+        with metrics.RENDERS_IN_FLIGHT.track_inprogress():
+            async with nullcontext() if slots is None else slots:
+                await self.admit(size)
+                try:
+                    body, seconds = await self.plot(schedule, plotter_class)
+                finally:
+                    self.release(size)
+        metrics.observe("plot", seconds)
+        return body
+
+    async def plot(
+        self,
+        schedule: dict[str, float],
+        plotter_class: type[Plotter]
+    ) -> tuple[bytes, float]:
+        """Plot the admitted chart and time it, see `timed_render_chart`. """
+        if not self.workers:
+            return timed_render_chart(schedule, plotter_class)
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self.pool, timed_render_chart, schedule, plotter_class
+            )
+        except BrokenProcessPool:
+            # e.g. worker was killed, let the next render restart it
+            self.shutdown()
+            raise
+
+
+class ChartUploader:
+    """
+    Pool of threads to upload charts to S3 off the event loop.
+    Uploads wait in a bounded queue for a free thread, so their network
+    round trips overlap instead of stalling the event loop one by one.
+    """
+
+    def __init__(self, *, workers: int, queue_size: int) -> None:
+        self.workers = workers
+        # uploads in progress plus uploads waiting for a free thread
+        self.slots = asyncio.Semaphore(workers + queue_size)
+        self.pool: ThreadPoolExecutor | None = None
+
+    def shutdown(self) -> None:
+        """
+        Wait for uploads in progress and stop the pool,
+        it's restarted on the next upload.
+        """
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Call S3 requesting `func` with `args` in the pool. """
+        async with self.slots:
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="uploader"
+                )
+            loop = asyncio.get_running_loop()
+            # thread sees context of the request, e.g. its metrics' labels
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(
+                self.pool, context.run, func, *args
+            )
+
+
+renderer = ChartRenderer(
+    workers=RENDER_WORKERS,
+    queue_size=RENDER_QUEUE_SIZE,
+    start_method=RENDER_START_METHOD
+)
+
+uploader = ChartUploader(
+    workers=S3_UPLOAD_WORKERS,
+    queue_size=S3_UPLOAD_QUEUE_SIZE
+)